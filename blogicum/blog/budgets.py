@@ -0,0 +1,88 @@
+"""Per-view SQL query budgets.
+
+A view declares ``query_budget`` (the most queries one request may run,
+session and user lookups included). ``QueryBudgetMiddleware`` measures
+every request; ``assert_query_budget`` does the same from tests.
+"""
+import re
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.db import connections
+from django.urls import resolve
+
+
+TRANSACTION_CONTROL_RE = re.compile(
+    r'\s*(BEGIN|SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b', re.I
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts queries and their total time.
+
+    Transaction control statements (``BEGIN``, savepoints) are not
+    counted; which of them run depends on whether the request is already
+    inside a transaction, as it is in most tests.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            if not TRANSACTION_CONTROL_RE.match(sql):
+                self.count += 1
+
+
+@contextmanager
+def count_queries():
+    """Count queries on every configured database inside the block."""
+    counter = QueryCounter()
+    wrappers = [
+        connection.execute_wrapper(counter)
+        for connection in connections.all()
+    ]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield counter
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+def get_query_budget(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_class, 'query_budget', None)
+
+
+def check_query_budget(view_name, budget, counter):
+    if budget is not None and counter.count > budget:
+        raise QueryBudgetExceeded(
+            f'{view_name} ran {counter.count} queries '
+            f'({counter.duration * 1000:.1f} ms), budget is {budget}.'
+        )
+
+
+def assert_query_budget(client, url, method='get', **kwargs):
+    """Request ``url`` with ``client`` and fail if it overruns its budget."""
+    match = resolve(urlsplit(url).path)
+    with count_queries() as counter:
+        response = getattr(client, method)(url, **kwargs)
+    try:
+        check_query_budget(
+            match.view_name, get_query_budget(match.func), counter
+        )
+    except QueryBudgetExceeded as e:
+        raise AssertionError(str(e))
+    return response
@@ -0,0 +1,127 @@
+"""Cache helpers for blog app.
+
+Cached values are keyed on the current version of one or more *tags*.
+Writers bump the tags they affect (see ``blog.signals``) instead of
+tracking and deleting individual keys.
+
+Expensive values such as pages and post cards go through
+``get_or_rebuild()``, which lets only one worker at a time rebuild a key
+while the others keep serving the previous value.
+"""
+import hashlib
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+TAG_KEY_PREFIX = 'blog:tag:'
+LEASE_SUFFIX = ':lease'
+# Spread of early refreshes; above 1 favours refreshing earlier.
+EARLY_REFRESH_BETA = 1.0
+LEASE_POLL_INTERVAL = 0.05
+
+
+def _new_version():
+    return str(time.time_ns())
+
+
+def tag_versions(*tags):
+    """Return current versions of ``tags``, creating missing ones."""
+    keys = [TAG_KEY_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    cache.set_many(
+        {TAG_KEY_PREFIX + tag: _new_version() for tag in tags},
+        timeout=None,
+    )
+
+
+def tagged_key(prefix, tags, *parts):
+    """Build a key that changes whenever any of ``tags`` is invalidated."""
+    digest = hashlib.md5(
+        ':'.join(tag_versions(*tags)).encode()
+    ).hexdigest()
+    return ':'.join((prefix, *map(str, parts), digest))
+
+
+def _is_fresh(entry, version):
+    value, entry_version, expires_at, delta = entry
+    if entry_version != version:
+        return False
+    if expires_at is None:
+        return True
+    # Probabilistic early refresh ("XFetch"): the closer the expiry and the
+    # slower the rebuild, the likelier one reader refreshes ahead of time,
+    # so popular keys are rebuilt before they expire for everybody at once.
+    gap = -delta * EARLY_REFRESH_BETA * math.log(1 - random.random())
+    return time.time() + gap < expires_at
+
+
+def _rebuild(key, version, build, timeout, cacheable):
+    start = time.time()
+    value = build()
+    if cacheable is None or cacheable(value):
+        expires_at = None if timeout is None else start + timeout
+        stale_timeout = None if timeout is None else (
+            timeout + settings.BLOG_CACHE_STALE_TIMEOUT
+        )
+        cache.set(
+            key,
+            (value, version, expires_at, time.time() - start),
+            stale_timeout,
+        )
+    return value
+
+
+def _count(metric, outcome):
+    if metric:
+        metrics.incr(f'{metric}.{outcome}')
+
+
+def get_or_rebuild(key, version, build, timeout, cacheable=None,
+                   metric=None):
+    """Return the value under ``key``, calling ``build()`` when it is stale.
+
+    An entry is stale once ``timeout`` seconds pass or ``version`` changes;
+    it is kept for ``BLOG_CACHE_STALE_TIMEOUT`` seconds longer. Whoever
+    takes the key's lease rebuilds it while the rest get the stale value,
+    or wait for the lease holder if there is none. Built values are only
+    stored if ``cacheable(value)`` allows it. Lookups are counted under
+    ``<metric>.hits``, ``.stale`` and ``.misses``.
+
+    The lease is taken with ``cache.add()``, which is atomic on memcached
+    and redis; on other backends two workers may occasionally both rebuild.
+    """
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, version):
+        _count(metric, 'hits')
+        return entry[0]
+    lease_timeout = settings.BLOG_CACHE_LEASE_TIMEOUT
+    lease = key + LEASE_SUFFIX
+    deadline = time.monotonic() + lease_timeout
+    while not cache.add(lease, 1, lease_timeout):
+        if entry is not None:
+            _count(metric, 'hits' if entry[1] == version else 'stale')
+            return entry[0]
+        if time.monotonic() >= deadline:
+            # The lease holder is too slow: build without storing a value.
+            _count(metric, 'misses')
+            return build()
+        time.sleep(LEASE_POLL_INTERVAL)
+        entry = cache.get(key)
+    _count(metric, 'misses')
+    try:
+        return _rebuild(key, version, build, timeout, cacheable)
+    finally:
+        cache.delete(lease)
@@ -0,0 +1,57 @@
+"""Fragment cache for post cards.
+
+A card shows the post with its category, location and author, so its key
+is stored with the post's and those rows' versions and the author's
+username. Writes bump versions (see ``core.models.TrackedModel``), which
+makes the stored card stale; ``blog.cache.get_or_rebuild()`` then lets one
+worker re-render it. Only the author sees the edit link, so that is part
+of the key.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from .cache import get_or_rebuild
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def _version(obj):
+    return '-' if obj is None else obj.version
+
+
+def card_cache_key(post, is_author):
+    return f'blog:card:{post.pk}:{int(is_author)}'
+
+
+def card_version(post):
+    parts = (
+        post.version,
+        _version(post.category),
+        _version(post.location),
+        post.author.username,
+    )
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def render_post_card(context, post):
+    """The card of ``post`` as ``CARD_TEMPLATE`` renders it in ``context``."""
+    user = getattr(context.get('request'), 'user', None)
+    is_author = bool(
+        user and user.is_authenticated and user.pk == post.author_id
+    )
+
+    def build():
+        template = context.template.engine.get_template(CARD_TEMPLATE)
+        with context.push(post=post):
+            return template.render(context)
+
+    html = get_or_rebuild(
+        card_cache_key(post, is_author),
+        card_version(post),
+        build,
+        settings.BLOG_POST_CARD_TIMEOUT,
+        metric='card_cache',
+    )
+    return mark_safe(html)
@@ -0,0 +1,104 @@
+"""Background resizing of uploaded post images.
+
+Saving a post stores its upload as is; the variants (see ``blog.images``)
+are built once the transaction commits, by a pool of
+``BLOG_IMAGE_WORKERS`` threads in the same process, so the request does
+not wait for Pillow. Cards show a placeholder until the variants are
+ready. Jobs lost with a restarting process, and every job when there
+are no workers, are left to ``manage.py build_image_variants``.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import metrics
+from .images import process_image, release_image
+from .page_cache import (
+    INDEX_TAG,
+    category_tag,
+    invalidate_pages,
+    post_tag,
+    profile_tag,
+)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BLOG_IMAGE_WORKERS,
+                thread_name_prefix='blog-images',
+            )
+        return _executor
+
+
+def build_variants(post_pk, name):
+    """Build the variants of post ``post_pk`` if its image is ``name``."""
+    from .models import IMAGE_FIELDS, Post, PostFile
+
+    post = (
+        Post.objects.only('pk', *IMAGE_FIELDS, 'image')
+        .filter(pk=post_pk, image=name)
+        .first()
+    )
+    if post is None:
+        # Deleted, or a newer upload has its own job.
+        return
+    try:
+        fields = process_image(post.image)
+    except (OSError, ValueError):
+        metrics.incr('images.failed')
+        logger.exception('Cannot resize the image of post %s', post_pk)
+        return
+    with transaction.atomic():
+        updated = Post.objects.filter(pk=post_pk, image=name).update(
+            **fields, **Post.bump_fields()
+        )
+        if updated:
+            PostFile.record(post_pk, name, fields['image_variants'])
+    if not updated:
+        release_image(post.image.storage, None, fields['image_variants'])
+        return
+    release_image(post.image.storage, None, post.image_variants)
+    metrics.incr('images.built')
+    related = (
+        Post.objects
+        .filter(pk=post_pk)
+        .values_list('category__slug', 'author__username')
+        .first()
+    ) or (None, None)
+    slug, username = related
+    invalidate_pages(
+        'image',
+        INDEX_TAG,
+        post_tag(post_pk),
+        *([category_tag(slug)] if slug else []),
+        *([profile_tag(username)] if username else []),
+    )
+
+
+def _run(post_pk, name):
+    try:
+        build_variants(post_pk, name)
+    finally:
+        # Pool threads outlive requests, which close their connections.
+        connection.close()
+
+
+def schedule_variants(post):
+    """Build the variants of ``post.image`` once the transaction commits."""
+    if not settings.BLOG_IMAGE_WORKERS:
+        return
+    post_pk, name = post.pk, post.image.name
+    transaction.on_commit(
+        lambda: _get_executor().submit(_run, post_pk, name)
+    )
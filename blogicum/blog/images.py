@@ -0,0 +1,196 @@
+"""Resized variants of post images.
+
+Cards and the post page show images much smaller than cameras take them,
+so every upload is re-encoded once at the widths they need: each display
+slot at 1x and 2x, in WebP and JPEG. ``make_variants()`` returns what
+``Post.image_variants`` stores, and ``picture()`` turns that into the
+``srcset`` and size attributes the ``post_image`` template tag renders.
+Images are never upscaled. ``dominant_color()`` gives the colour shown
+while an image loads.
+
+Variants are saved through the image's storage like the image itself and
+given back with ``release_image()`` (see ``blog.storage``).
+"""
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Display width of each slot in CSS pixels, and its ``sizes`` attribute.
+SLOTS = {
+    'card': (200, '200px'),
+    'detail': (400, '(max-width: 400px) 100vw, 400px'),
+}
+DENSITIES = (1, 2)
+# Preferred first: browsers take the first ``<source>`` they support.
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+QUALITY = 80
+VARIANTS_DIR = 'variants'
+BACKGROUND = (255, 255, 255)
+# Size of the thumbnail and number of colours the dominant one is from.
+COLOR_SAMPLE = 64
+COLOR_PALETTE = 8
+# EXIF orientations that turn the image a quarter.
+EXIF_ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def variant_widths(width):
+    return sorted({
+        min(slot_width * density, width)
+        for slot_width, _ in SLOTS.values()
+        for density in DENSITIES
+    })
+
+
+def _scaled_height(size, width):
+    original_width, original_height = size
+    return max(1, round(original_height * width / original_width))
+
+
+def display_size(size, slot):
+    """Width and height of an image of ``size`` shown in ``slot``."""
+    width = min(SLOTS[slot][0], size[0])
+    return width, _scaled_height(size, width)
+
+
+def upright_size(file):
+    """Width and height of an image file shown upright, from its header.
+
+    ``(None, None)`` if the file cannot be read as an image.
+    """
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+            orientation = image.getexif().get(EXIF_ORIENTATION)
+    except (OSError, ValueError):
+        return None, None
+    finally:
+        file.seek(0)
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def load_image(image_file):
+    """Decode an image field file upright and without transparency."""
+    with image_file.open('rb'), Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            flat = Image.new('RGB', image.size, BACKGROUND)
+            flat.paste(image, mask=image.getchannel('A'))
+            return flat
+        return image.convert('RGB')
+
+
+def _encode(image, image_format):
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=QUALITY, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def dominant_color(image):
+    """The most common colour of a decoded image, as ``#rrggbb``."""
+    sample = image.copy()
+    sample.thumbnail((COLOR_SAMPLE, COLOR_SAMPLE))
+    palette = sample.quantize(colors=COLOR_PALETTE)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def make_variants(image_file, original=None):
+    """Resize and store the variants of a saved image field file.
+
+    ``original`` is the decoded image, if already loaded. Returns the
+    original size and, for each format, ``[width, height, name]`` of every
+    variant from the narrowest up.
+    """
+    if original is None:
+        original = load_image(image_file)
+    path = PurePosixPath(image_file.name)
+    variants = {'width': original.width, 'height': original.height}
+    for width in variant_widths(original.width):
+        size = (width, _scaled_height(original.size, width))
+        resized = original.resize(size, Image.Resampling.LANCZOS)
+        for extension, (image_format, _) in FORMATS.items():
+            name = image_file.storage.save(
+                str(path.parent / VARIANTS_DIR
+                    / f'{path.stem}-{width}w.{extension}'),
+                _encode(resized, image_format),
+            )
+            variants.setdefault(extension, []).append([*size, name])
+    return variants
+
+
+def process_image(image_file):
+    """Variants, upright size and colour of a saved image field file.
+
+    Returned as values of the ``Post`` fields that keep them.
+    """
+    original = load_image(image_file)
+    return {
+        'image_variants': make_variants(image_file, original),
+        'image_width': original.width,
+        'image_height': original.height,
+        'image_color': dominant_color(original),
+    }
+
+
+def variant_names(variants):
+    return [
+        name
+        for extension in FORMATS
+        for _, _, name in variants.get(extension, ())
+    ]
+
+
+def release_image(storage, name, variants):
+    """Delete an image and its variants, or drop references to them."""
+    names = ([name] if name else []) + variant_names(variants)
+    if hasattr(storage, 'delete_many'):
+        storage.delete_many(names)
+    else:
+        for stored_name in names:
+            storage.delete(stored_name)
+
+
+def picture(image_file, variants, slot):
+    """Attributes of ``<source>`` and ``<img>`` tags for ``slot``.
+
+    ``None`` if the image has no variants yet.
+    """
+    if not variants.get('width'):
+        return None
+    sizes = SLOTS[slot][1]
+    url = image_file.storage.url
+    sources = [
+        {
+            'type': content_type,
+            'srcset': ', '.join(
+                f'{url(name)} {width}w'
+                for width, _, name in variants[extension]
+            ),
+        }
+        for extension, (_, content_type) in FORMATS.items()
+    ]
+    width, height = display_size(
+        (variants['width'], variants['height']), slot
+    )
+    # The fallback ``src`` is the narrowest JPEG that fills the slot.
+    src = next(
+        (name for w, _, name in variants['jpeg'] if w >= width),
+        variants['jpeg'][-1][2],
+    )
+    return {
+        'sources': sources,
+        'sizes': sizes,
+        'src': url(src),
+        'width': width,
+        'height': height,
+    }
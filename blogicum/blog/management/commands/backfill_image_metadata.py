@@ -0,0 +1,59 @@
+"""Store the size, file size and colour of post images saved without them."""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog.images import dominant_color, load_image
+from blog.models import Post
+from blog.page_cache import PAGES_TAG, invalidate_pages
+
+
+class Command(BaseCommand):
+    help = 'Fill image width, height, file size and colour of posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, batch_size, **options):
+        # Rows rather than posts: only the image name is needed.
+        queryset = (
+            Post.objects
+            .exclude(Q(image='') | Q(image__isnull=True))
+            .filter(
+                Q(image_width__isnull=True)
+                | Q(image_height__isnull=True)
+                | Q(image_size__isnull=True)
+                | Q(image_color='')
+            )
+            .order_by('pk')
+            .values_list('pk', 'image')
+        )
+        storage = Post._meta.get_field('image').storage
+        filled = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for pk, name in batch:
+                try:
+                    with storage.open(name) as image_file:
+                        image = load_image(image_file)
+                    size = storage.size(name)
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f'Post {pk}: {e}')
+                    continue
+                Post.objects.filter(pk=pk).update(
+                    image_width=image.width,
+                    image_height=image.height,
+                    image_size=size,
+                    image_color=dominant_color(image),
+                    **Post.bump_fields(),
+                )
+                filled += 1
+            last_pk = batch[-1][0]
+        self.stdout.write(
+            f'Filled image metadata for {filled} posts, {failed} failed.'
+        )
+        if filled:
+            invalidate_pages('backfill_image_metadata', PAGES_TAG)
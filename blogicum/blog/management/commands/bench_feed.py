@@ -0,0 +1,106 @@
+"""Compare ways of counting comments on one feed page.
+
+The data set is created inside a transaction that is rolled back, so the
+command can be pointed at any database:
+
+    python manage.py bench_feed --posts 50 --comments 500
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post, comment_count_subquery
+
+User = get_user_model()
+
+PAGE_SIZE = 10
+
+
+def read_page(queryset, count):
+    for post in queryset.order_by('-pub_date')[:PAGE_SIZE]:
+        count(post)
+
+
+def fetched_bytes(queries):
+    """Re-run captured SELECTs and sum the size of the returned values."""
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            cursor.execute(query['sql'])
+            for row in cursor.fetchall():
+                total += sum(len(str(value)) for value in row)
+    return total
+
+
+class Command(BaseCommand):
+    help = 'Benchmark comment counting on a feed page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=PAGE_SIZE * 2)
+        parser.add_argument('--comments', type=int, default=200,
+                            help='Comments per post.')
+        parser.add_argument('--comment-size', type=int, default=500,
+                            help='Characters per comment.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(**options)
+            posts = Post.objects.with_related()
+            for label, queryset, count in (
+                (
+                    'prefetch_related',
+                    posts.prefetch_related('comments'),
+                    lambda post: post.comments.count(),
+                ),
+                (
+                    'subquery',
+                    posts.annotate(live_count=comment_count_subquery()),
+                    lambda post: post.live_count,
+                ),
+                (
+                    'column',
+                    posts,
+                    lambda post: post.comment_count,
+                ),
+            ):
+                self.measure(label, queryset, count)
+            transaction.set_rollback(True)
+
+    def seed(self, posts, comments, comment_size, **options):
+        author = User.objects.create(username='bench-feed-author')
+        category = Category.objects.create(
+            title='bench', description='bench', slug='bench-feed'
+        )
+        Post.objects.bulk_create(
+            Post(
+                title=f'Post {i}',
+                text='text',
+                pub_date=timezone.now(),
+                author=author,
+                category=category,
+            )
+            for i in range(posts)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text='x' * comment_size)
+            for post in Post.objects.filter(category=category)
+            for _ in range(comments)
+        )
+        Post.objects.filter(category=category).update(
+            comment_count=comment_count_subquery()
+        )
+
+    def measure(self, label, queryset, count):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            read_page(queryset, count)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{label:>18}: {len(context.captured_queries)} queries, '
+            f'{fetched_bytes(context.captured_queries)} bytes, '
+            f'{elapsed * 1000:.1f} ms'
+        )
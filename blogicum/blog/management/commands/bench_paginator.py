@@ -0,0 +1,62 @@
+"""Render the feed paginator for feeds of growing length.
+
+Compares includes/paginator.html with the previous markup, which emitted
+one link per page: python manage.py bench_paginator --pages 10 1000 50000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Context, Template
+from django.template.loader import get_template
+
+PER_PAGE = 10
+ROUNDS = 20
+
+LEGACY_TEMPLATE = Template('''
+<ul class="pagination justify-content-center">
+  <li class="page-item"><a class="page-link" href="?page=1">Первая</a></li>
+  {% for i in page_obj.paginator.page_range %}
+    {% if page_obj.number == i %}
+      <li class="page-item active">
+        <span class="page-link">{{ i }}</span>
+      </li>
+    {% else %}
+      <li class="page-item">
+        <a class="page-link" href="?page={{ i }}">{{ i }}</a>
+      </li>
+    {% endif %}
+  {% endfor %}
+</ul>
+''')
+
+
+def render(template, context):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        html = template.render(context)
+    return len(html.encode()), (time.perf_counter() - start) / ROUNDS
+
+
+class Command(BaseCommand):
+    help = 'Benchmark response size and render time of the paginator.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, nargs='+', default=[10, 1000, 50000]
+        )
+
+    def handle(self, *args, pages, **options):
+        elided = get_template('includes/paginator.html')
+        for num_pages in pages:
+            paginator = Paginator(range(num_pages * PER_PAGE), PER_PAGE)
+            page_obj = paginator.page((num_pages + 1) // 2)
+            legacy_size, legacy_time = render(
+                LEGACY_TEMPLATE, Context({'page_obj': page_obj})
+            )
+            size, elapsed = render(elided, {'page_obj': page_obj})
+            self.stdout.write(
+                f'{num_pages:>7} pages: '
+                f'page_range {legacy_size:>9} B {legacy_time * 1000:8.2f} ms'
+                f' | elided {size:>5} B {elapsed * 1000:6.2f} ms'
+            )
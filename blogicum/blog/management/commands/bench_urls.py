@@ -0,0 +1,105 @@
+"""Time URL reversing on a feed page of post cards.
+
+Renders includes/post_card.html for a page of in-memory posts, as it is
+and with ``{% fast_url %}`` swapped back to ``{% url %}``; no database is
+needed: python manage.py bench_urls --rounds 200
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template import Engine, RequestContext
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Category, Location, Post
+from blog.routing import fast_reverse
+
+User = get_user_model()
+
+PAGE_SIZE = 10
+TEMPLATES = ('includes/post_card.html', 'includes/category_link.html')
+
+
+def page_of_posts():
+    author = User(pk=1, username='author')
+    category = Category(pk=1, slug='travel', title='Travel')
+    location = Location(pk=1, name='Moscow')
+    return [
+        Post(
+            pk=pk,
+            title=f'Post {pk}',
+            excerpt='Excerpt',
+            pub_date=timezone.now(),
+            author=author,
+            category=category,
+            location=location,
+        )
+        for pk in range(1, PAGE_SIZE + 1)
+    ]
+
+
+def card_engine(replace):
+    """An engine serving the card templates with ``replace`` applied."""
+    default = Engine.get_default()
+    sources = {
+        name: replace(default.get_template(name).source) for name in TEMPLATES
+    }
+    return Engine(
+        loaders=[(
+            'django.template.loaders.cached.Loader',
+            [('django.template.loaders.locmem.Loader', sources)],
+        )],
+        libraries={'blog_tags': 'blog.templatetags.blog_tags'},
+    )
+
+
+def time_page(engine, request, posts, rounds):
+    template = engine.get_template('includes/post_card.html')
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for post in posts:
+            template.render(RequestContext(request, {'post': post}))
+    return (time.perf_counter() - start) / rounds
+
+
+class Command(BaseCommand):
+    help = 'Benchmark reverse() against fast_reverse() on post cards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=200)
+
+    def handle(self, *args, rounds, **options):
+        request = RequestFactory().get('/')
+        request.user = User(pk=1, username='author')
+        posts = page_of_posts()
+
+        calls = [
+            ('blog:post_detail', 1),
+            ('blog:edit_post', 1),
+            ('blog:category_posts', 'travel'),
+        ] * PAGE_SIZE
+        for label, func in (
+            ('reverse', lambda name, arg: reverse(name, args=[arg])),
+            ('fast_reverse', fast_reverse),
+        ):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for name, arg in calls:
+                    func(name, arg)
+            elapsed = (time.perf_counter() - start) / rounds
+            self.stdout.write(
+                f'{label:>14}: {len(calls)} calls {elapsed * 1000:7.3f} ms'
+            )
+
+        for label, engine in (
+            ('{% url %}', card_engine(
+                lambda source: source.replace('{% fast_url ', '{% url ')
+            )),
+            ('{% fast_url %}', card_engine(lambda source: source)),
+        ):
+            elapsed = time_page(engine, request, posts, rounds)
+            self.stdout.write(
+                f'{label:>14}: {PAGE_SIZE} cards {elapsed * 1000:7.3f} ms'
+            )
@@ -0,0 +1,60 @@
+"""Build the resized variants of post images uploaded without them."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from blog.images import process_image, release_image
+from blog.models import IMAGE_FIELDS, Post, PostFile
+from blog.page_cache import PAGES_TAG, invalidate_pages
+
+
+class Command(BaseCommand):
+    help = 'Resize post images that have no variants yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--all',
+            dest='everything',
+            action='store_true',
+            help='Rebuild the variants of every image.',
+        )
+
+    def handle(self, *args, batch_size, everything, **options):
+        queryset = (
+            Post.objects
+            .exclude(Q(image='') | Q(image__isnull=True))
+            .only('pk', 'image', *IMAGE_FIELDS)
+            .order_by('pk')
+        )
+        if not everything:
+            queryset = queryset.filter(image_variants={})
+        built = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                try:
+                    fields = process_image(post.image)
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f'Post {post.pk}: {e}')
+                    continue
+                with transaction.atomic():
+                    # Bumping the version re-renders the post's cached cards.
+                    Post.objects.filter(pk=post.pk).update(
+                        **fields, **Post.bump_fields()
+                    )
+                    PostFile.record(
+                        post.pk, post.image.name, fields['image_variants']
+                    )
+                release_image(post.image.storage, None, post.image_variants)
+                built += 1
+            last_pk = batch[-1].pk
+        self.stdout.write(
+            f'Built image variants for {built} posts, {failed} failed.'
+        )
+        if built:
+            invalidate_pages('build_image_variants', PAGES_TAG)
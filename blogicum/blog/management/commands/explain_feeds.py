@@ -0,0 +1,162 @@
+"""Print query plans for the feed, category, profile and detail pages.
+
+Synthetic rows are inserted inside a transaction that is rolled back:
+
+    python manage.py explain_feeds --posts 1000000
+
+The command exits with an error when a plan still contains a full scan of
+``blog_post``/``blog_comment`` or a temporary B-tree sort. ``ANALYZE`` is
+not run, matching a database that Django migrated: with SQLite statistics
+present the planner ignores ``LIMIT`` and may drive the feed join from
+``auth_user`` instead.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+from blog.registry import reload_registry
+
+User = get_user_model()
+
+PAGE_SIZE = 10
+BATCH_SIZE = 10000
+PROBLEMS = ('SCAN blog_post', 'SCAN blog_comment', 'TEMP B-TREE')
+
+
+def plan_problems(plan):
+    return [
+        line for line in plan.splitlines()
+        if any(problem in line for problem in PROBLEMS)
+        and 'USING' not in line
+        or 'TEMP B-TREE' in line
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Show EXPLAIN output for the blog hot paths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            author, category = self.seed(**options)
+            failed = self.explain_all(author, category)
+            transaction.set_rollback(True)
+        if failed:
+            raise CommandError(
+                'Full scans or temporary sorts in: ' + ', '.join(failed)
+            )
+
+    def seed(self, posts, authors, categories, comments, **options):
+        self.stdout.write(f'Seeding {posts} posts...')
+        User.objects.bulk_create(
+            User(username=f'explain-{i}') for i in range(authors)
+        )
+        author_ids = list(
+            User.objects
+            .filter(username__startswith='explain-')
+            .values_list('pk', flat=True)
+        )
+        Category.objects.bulk_create(
+            Category(
+                title=f'Category {i}',
+                description='explain',
+                slug=f'explain-{i}',
+                is_published=i % 10 != 0,
+            )
+            for i in range(categories)
+        )
+        category_ids = list(
+            Category.objects
+            .filter(slug__startswith='explain-')
+            .values_list('pk', flat=True)
+        )
+        location = Location.objects.create(name='explain')
+        now = timezone.now()
+        for start in range(0, posts, BATCH_SIZE):
+            Post.objects.bulk_create(
+                Post(
+                    title=f'Post {i}',
+                    text='explain',
+                    pub_date=now - timedelta(minutes=i),
+                    is_published=i % 20 != 0,
+                    author_id=random.choice(author_ids),
+                    category_id=random.choice(category_ids),
+                    location=location,
+                )
+                for i in range(start, min(start + BATCH_SIZE, posts))
+            )
+        post_ids = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True)[:1000]
+        )
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post_id=random.choice(post_ids),
+                    author_id=random.choice(author_ids),
+                    text='explain',
+                )
+                for _ in range(comments)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        # bulk_create() sends no signals to refresh the registry.
+        reload_registry()
+        return (
+            User.objects.get(pk=author_ids[0]),
+            Category.objects.filter(is_published=True).first(),
+        )
+
+    def explain_all(self, author, category):
+        post = Post.objects.visible().first()
+        hot_paths = (
+            ('blog:index', Post.objects.visible().for_listing()),
+            (
+                'blog:category_posts',
+                Post.objects
+                .visible()
+                .for_listing()
+                .filter(category=category),
+            ),
+            (
+                'blog:profile (visitor)',
+                Post.objects
+                .visible_for(AnonymousUser())
+                .for_listing()
+                .filter(author=author),
+            ),
+            (
+                'blog:profile (owner)',
+                Post.objects
+                .visible_for(author)
+                .for_listing()
+                .filter(author=author),
+            ),
+            (
+                'blog:post_detail comments',
+                Comment.objects
+                .filter(post=post)
+                .select_related('author')
+                .order_by('created_at'),
+            ),
+        )
+        failed = []
+        for name, queryset in hot_paths:
+            plan = queryset[:PAGE_SIZE].explain()
+            problems = plan_problems(plan)
+            style = self.style.ERROR if problems else self.style.SUCCESS
+            self.stdout.write(style(name))
+            self.stdout.write(plan)
+            if problems:
+                failed.append(name)
+        return failed
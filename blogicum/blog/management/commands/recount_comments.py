@@ -0,0 +1,33 @@
+"""Reconcile Post.comment_count with the comments table."""
+from django.core.management.base import BaseCommand
+from django.db.models import F, Max
+
+from blog.models import Post, comment_count_subquery
+from blog.page_cache import PAGES_TAG, invalidate_pages
+
+
+class Command(BaseCommand):
+    help = 'Fix posts whose comment_count drifted from their comments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, batch_size, **options):
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        fixed = 0
+        for start in range(0, last_pk + 1, batch_size):
+            drifted = list(
+                Post.objects
+                .filter(pk__gte=start, pk__lt=start + batch_size)
+                .alias(actual=comment_count_subquery())
+                .exclude(comment_count=F('actual'))
+                .values_list('pk', flat=True)
+            )
+            if drifted:
+                fixed += Post.objects.filter(pk__in=drifted).update(
+                    comment_count=comment_count_subquery(),
+                    **Post.bump_fields(),
+                )
+        if fixed:
+            invalidate_pages('recount_comments', PAGES_TAG)
+        self.stdout.write(f'Fixed comment_count on {fixed} posts.')
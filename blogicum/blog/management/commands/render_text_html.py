@@ -0,0 +1,71 @@
+"""Fill the pre-rendered text_html of posts and comments.
+
+Post excerpts are filled the same way. Both are rendered on ``save()``,
+fixture loads and ``bulk_create()``; rows written any other way, such as
+with ``update()`` or raw SQL, come without them.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog.models import Comment, Post, make_excerpt
+from blog.page_cache import PAGES_TAG, invalidate_pages
+from core.models import render_text
+
+# Fields rendered from ``text``, per model.
+RENDERED_FIELDS = (
+    ('posts', Post, {'text_html': render_text, 'excerpt': make_excerpt}),
+    ('comments', Comment, {'text_html': render_text}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Render text_html for posts and comments, and excerpts for posts, '
+        'saved without them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--all',
+            dest='everything',
+            action='store_true',
+            help='Re-render every row, not only the ones missing text.',
+        )
+
+    def handle(self, *args, batch_size, everything, **options):
+        total = 0
+        for name, model, renderers in RENDERED_FIELDS:
+            rendered = self.render(model, renderers, batch_size, everything)
+            total += rendered
+            self.stdout.write(
+                f'Rendered {", ".join(renderers)} for {rendered} {name}.'
+            )
+        if total:
+            invalidate_pages('render_text_html', PAGES_TAG)
+
+    def render(self, model, renderers, batch_size, everything):
+        queryset = model.objects.only('pk', 'text').order_by('pk')
+        if not everything:
+            missing = Q()
+            for field_name in renderers:
+                missing |= Q(**{field_name: ''})
+            queryset = queryset.filter(missing)
+        rendered = 0
+        last_pk = 0
+        while True:
+            # Walk by primary key: updated rows leave the filter, and
+            # SQLite cannot write to a table under an open cursor.
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return rendered
+            for obj in batch:
+                for field_name, render in renderers.items():
+                    setattr(obj, field_name, render(obj.text))
+            model.objects.bulk_update(batch, list(renderers))
+            # bulk_update() leaves versions, which key the cached cards.
+            model.objects.filter(
+                pk__in=[obj.pk for obj in batch]
+            ).update(**model.bump_fields())
+            rendered += len(batch)
+            last_pk = batch[-1].pk
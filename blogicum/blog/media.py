@@ -0,0 +1,202 @@
+"""Serving uploaded media in production.
+
+``serve_media`` checks that a path is servable and belongs to a post the
+user may see, then hands the transfer to the front-end server when
+``BLOG_MEDIA_OFFLOAD`` says which header it understands:
+``'x-accel-redirect'`` (nginx, with an ``internal`` location at
+``BLOG_MEDIA_INTERNAL_URL``) or ``'x-sendfile'`` (Apache, lighttpd).
+Otherwise the file itself goes out as a ``FileResponse``, which WSGI
+servers with ``wsgi.file_wrapper`` send with ``sendfile()``, answering
+conditional and single-range requests.
+
+Content-addressed files (see ``blog.storage``) never change, so they are
+cached for a year as ``immutable``. Images only their author may see are
+cached privately.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_addressed
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def media_path(path):
+    """Absolute path of a servable media file, or ``Http404``.
+
+    Hidden files and directories, such as the storage's staging area,
+    are never served.
+    """
+    name = posixpath.normpath(path).lstrip('/')
+    if any(part.startswith('.') for part in name.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return name, full_path
+
+
+def media_visibility(request, name):
+    """Who may get file ``name``: ``'public'``, ``'private'`` or ``None``.
+
+    Files are served for the posts showing them, as the image or one of its
+    variants: to everyone while one of those posts is visible, and only to
+    its author while it is unpublished or scheduled. Other files are not
+    served at all. Posts are found through the indexed ``PostFile`` names.
+    """
+    from .models import Post
+
+    posts = Post.objects.filter(files__name=name)
+    if posts.visible().exists():
+        return 'public'
+    user = request.user
+    if user.is_authenticated and posts.filter(author=user).exists():
+        return 'private'
+    return None
+
+
+def _etag(name, stat):
+    if is_content_addressed(name):
+        return quote_etag(posixpath.splitext(posixpath.basename(name))[0])
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def parse_range(header, size):
+    """``(start, end)`` of a single byte range, ``None`` for the whole file.
+
+    Raises ``ValueError`` for a range past the end of the file.
+    """
+    match = RANGE_RE.match(header or '')
+    if match is None:
+        # Missing, malformed or several ranges: send the whole file.
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+class _RangeFile:
+    """Reads ``length`` bytes of an open file from its position.
+
+    Keeps ``fileno()`` so that ``wsgi.file_wrapper`` can still use
+    ``sendfile()``, which is bounded by ``Content-Length``.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _file_response(request, full_path, size, content_type, etag, modified):
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range in (etag, http_date(modified)):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+        return response
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(
+        _RangeFile(file, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def _offload_response(name, full_path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.BLOG_MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.BLOG_MEDIA_INTERNAL_URL + quote(name)
+        )
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    name, full_path = media_path(path)
+    visibility = media_visibility(request, name)
+    if visibility is None:
+        raise Http404
+    stat = os.stat(full_path)
+    etag = _etag(name, stat)
+    modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=modified
+    )
+    if response is None:
+        content_type = (
+            mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        )
+        if settings.BLOG_MEDIA_OFFLOAD:
+            response = _offload_response(name, full_path, content_type)
+        else:
+            response = _file_response(
+                request, full_path, stat.st_size, content_type, etag,
+                modified,
+            )
+            response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified)
+    cache_control = {visibility: True}
+    if is_content_addressed(name):
+        patch_cache_control(
+            response, max_age=IMMUTABLE_MAX_AGE, immutable=True,
+            **cache_control,
+        )
+    else:
+        patch_cache_control(
+            response, max_age=settings.BLOG_MEDIA_MAX_AGE, **cache_control
+        )
+    return response
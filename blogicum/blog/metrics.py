@@ -0,0 +1,25 @@
+"""In-process counters for blog app.
+
+Each worker keeps its own numbers; ``snapshot()`` returns them for logging
+or for an endpoint to expose.
+"""
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_counters = Counter()
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot():
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
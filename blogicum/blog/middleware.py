@@ -0,0 +1,61 @@
+import logging
+
+from django.conf import settings
+
+from . import metrics
+from .budgets import (
+    QueryBudgetExceeded,
+    check_query_budget,
+    count_queries,
+    get_query_budget,
+)
+from .registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Check each request against its view's ``query_budget``.
+
+    Overruns raise ``QueryBudgetExceeded`` when ``QUERY_BUDGET_STRICT`` is
+    on (by default in ``DEBUG``) and are logged and counted otherwise.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with count_queries() as counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        view_name = match.view_name
+        metrics.incr(f'db.queries.{view_name}', counter.count)
+        metrics.incr(f'db.time_ms.{view_name}', counter.duration * 1000)
+        try:
+            check_query_budget(
+                view_name, get_query_budget(match.func), counter
+            )
+        except QueryBudgetExceeded as e:
+            metrics.incr(f'db.budget_exceeded.{view_name}')
+            if getattr(settings, 'QUERY_BUDGET_STRICT', settings.DEBUG):
+                raise
+            logger.warning(str(e))
+        return response
+
+
+class RegistryMiddleware:
+    """Bring the registry up to date before the request is measured.
+
+    Installed ahead of ``QueryBudgetMiddleware``: a worker's first request,
+    or its first one after a category or location changed, reloads the
+    registry, which no view's ``query_budget`` pays for.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        get_registry()
+        return self.get_response(request)
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:15
+
+import core.models
+from django.db import migrations
+from django.template.defaultfilters import linebreaksbr
+
+BATCH_SIZE = 1000
+
+
+def fill_text_html(apps, schema_editor):
+    for model_name in ('post', 'comment'):
+        model = apps.get_model('blog', model_name)
+        batch = []
+        for obj in model.objects.only('pk', 'text').iterator(BATCH_SIZE):
+            obj.text_html = linebreaksbr(obj.text, autoescape=True)
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, ['text_html'])
+                batch = []
+        model.objects.bulk_update(batch, ['text_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=core.models.RenderedTextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=core.models.RenderedTextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(fill_text_html, migrations.RunPython.noop),
+    ]
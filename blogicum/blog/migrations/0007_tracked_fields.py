@@ -0,0 +1,66 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:21
+
+import core.models
+from django.db import migrations
+from django.db.models import F
+
+TRACKED_MODELS = ('category', 'comment', 'location', 'post')
+
+
+def updated_at_from_created_at(apps, schema_editor):
+    for model_name in TRACKED_MODELS:
+        model = apps.get_model('blog', model_name)
+        model.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=core.models.UpdatedAtField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='version',
+            field=core.models.VersionField(default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=core.models.UpdatedAtField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='version',
+            field=core.models.VersionField(default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='updated_at',
+            field=core.models.UpdatedAtField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='version',
+            field=core.models.VersionField(default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=core.models.UpdatedAtField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='version',
+            field=core.models.VersionField(default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.RunPython(
+            updated_at_from_created_at, migrations.RunPython.noop
+        ),
+    ]
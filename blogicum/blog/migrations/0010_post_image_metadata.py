@@ -0,0 +1,39 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:44
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_storedfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Основной цвет изображения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=core.models.HeightField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла изображения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=core.models.WidthField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', null=True, upload_to='posts/', verbose_name='Изображение', width_field='image_width'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:58
+
+import core.models
+from django.db import migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='updated_at',
+            field=core.models.UpdatedAtField(blank=True, db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Изменено'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='updated_at',
+            field=core.models.UpdatedAtField(blank=True, db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Изменено'),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='updated_at',
+            field=core.models.UpdatedAtField(blank=True, db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Изменено'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='updated_at',
+            field=core.models.UpdatedAtField(blank=True, db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Изменено'),
+        ),
+    ]
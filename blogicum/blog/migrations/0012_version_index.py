@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:59
+
+import core.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_updated_at_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='version',
+            field=core.models.VersionField(db_index=True, default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='version',
+            field=core.models.VersionField(db_index=True, default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='version',
+            field=core.models.VersionField(db_index=True, default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='version',
+            field=core.models.VersionField(db_index=True, default=0, editable=False, verbose_name='Версия'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+VARIANT_FORMATS = ('webp', 'jpeg')
+
+
+def record_post_files(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    PostFile = apps.get_model('blog', 'PostFile')
+    posts = (
+        Post.objects.exclude(image='').exclude(image__isnull=True)
+        .values_list('pk', 'image', 'image_variants')
+    )
+    batch = []
+    for pk, image, variants in posts.iterator(BATCH_SIZE):
+        names = [image] + [
+            name
+            for extension in VARIANT_FORMATS
+            for _, _, name in (variants or {}).get(extension, ())
+        ]
+        batch.extend(PostFile(post_id=pk, name=name) for name in names)
+        if len(batch) >= BATCH_SIZE:
+            PostFile.objects.bulk_create(batch)
+            batch = []
+    PostFile.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255, verbose_name='Путь к файлу')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'файл публикации',
+                'verbose_name_plural': 'Файлы публикаций',
+            },
+        ),
+        migrations.RunPython(record_post_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,141 @@
+"""Reusable view mixins for blog app."""
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+
+from . import metrics, page_cache
+from .cache import get_or_rebuild
+from .paginators import CachedCountPaginator, InvalidCursor, KeysetPaginator
+
+
+class PageCacheMixin:
+    """Answer unchanged pages with 304 and anonymous ones from the cache.
+
+    Views list the cache tags a page depends on in ``get_page_cache_tags()``;
+    ``blog.signals`` invalidates them when the underlying data changes. The
+    tag versions also make the page's ETag, checked before the view runs.
+    Cached pages are rebuilt through ``blog.cache.get_or_rebuild()``.
+    """
+
+    def get_page_cache_tags(self):
+        return ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        tags = self.get_page_cache_tags()
+        etag = page_cache.page_etag(request, tags)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            metrics.incr('page_cache.not_modified')
+        else:
+            response = self.dispatch_cached(
+                request, tags, etag, *args, **kwargs
+            )
+        # A stale page from the cache keeps the ETag it was built with.
+        if response.status_code in (200, 304) and 'ETag' not in response:
+            response['ETag'] = etag
+        return response
+
+    def dispatch_cached(self, request, tags, etag, *args, **kwargs):
+        if not page_cache.is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        def build():
+            response = super(PageCacheMixin, self).dispatch(
+                request, *args, **kwargs
+            )
+            # Rendered here so that the lease covers the whole rebuild.
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code == 200:
+                response['ETag'] = etag
+            return response
+
+        return get_or_rebuild(
+            page_cache.page_cache_key(request),
+            page_cache.page_version(tags),
+            build,
+            page_cache.page_cache_timeout(),
+            # Checked once rendered: templates mark CSRF token use.
+            cacheable=lambda response: page_cache.is_cacheable_response(
+                request, response
+            ),
+            metric='page_cache',
+        )
+
+
+class FeedPaginationMixin:
+    """Offset pagination by default, keyset pagination when opted in.
+
+    Set ``keyset_pagination`` on the view, or ``BLOG_KEYSET_PAGINATION`` in
+    settings, to page through ``?cursor=`` tokens instead of ``?page=N``.
+    Offset pages take their total from the cache; views name the cached
+    total with ``get_count_cache_key()``.
+    """
+
+    paginator_class = CachedCountPaginator
+    keyset_pagination = None
+    cursor_kwarg = 'cursor'
+
+    def get_count_cache_key(self):
+        return None
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return super().get_paginator(
+            queryset,
+            per_page,
+            cache_key=self.get_count_cache_key(),
+            **kwargs,
+        )
+
+    def use_keyset_pagination(self):
+        if self.keyset_pagination is not None:
+            return self.keyset_pagination
+        return getattr(settings, 'BLOG_KEYSET_PAGINATION', False)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_keyset_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class OwnershipMixin:
+    """Let only the author (or staff, if allowed) change an object.
+
+    The object is fetched once in ``dispatch`` with ``get_queryset()`` and
+    reused by the generic view for the rest of the request. Others are
+    redirected to ``get_denied_url()``.
+    """
+
+    allow_staff = False
+
+    def dispatch(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if not self.is_owner():
+            return redirect(self.get_denied_url())
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, 'object', None) is not None:
+            return self.object
+        return super().get_object(queryset)
+
+    def is_owner(self):
+        user = self.request.user
+        return (
+            self.object.author_id == user.pk
+            or self.allow_staff and user.is_staff
+        )
+
+    def get_denied_url(self):
+        """The page of the post the object is or belongs to."""
+        post_id = getattr(self.object, 'post_id', self.object.pk)
+        return reverse('blog:post_detail', kwargs={'id': post_id})
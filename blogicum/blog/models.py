@@ -1,12 +1,27 @@
 """Models for blog app."""
+from collections import Counter
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.query import ModelIterable
+from django.utils import timezone
+from django.utils.text import Truncator
 
 from core import models as published
 
+from .image_queue import schedule_variants
+from .images import upright_size, variant_names
+from .registry import get_registry
+
 
 User = get_user_model()
 
+EXCERPT_WORDS = 20
+# Post fields ``blog.image_queue`` fills in once an image is stored.
+IMAGE_FIELDS = ('image_variants', 'image_color', 'image_width', 'image_height')
+
 
 class Category(published.PublishedModel):
     title = models.CharField(
@@ -51,6 +66,76 @@ class Location(published.PublishedModel):
         return self.name
 
 
+def make_excerpt(text):
+    """Card teaser, as ``truncatewords`` would render it."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+def visible_posts_q():
+    """Posts shown to everyone: published, due and in a published category."""
+    # Excluding the few hidden categories rather than listing the published
+    # ones keeps SQLite on the pub_date index instead of sorting the feed.
+    return Q(
+        pub_date__lte=timezone.now(),
+        is_published=True,
+        category_id__isnull=False,
+    ) & ~Q(category_id__in=get_registry().unpublished_category_ids)
+
+
+def comment_count_subquery():
+    """Live count of a post's comments, to reconcile ``comment_count``."""
+    comments = (
+        Comment.objects
+        .filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(comments), 0)
+
+
+class RegistryIterable(ModelIterable):
+    """Posts with category and location taken from the registry."""
+
+    def __iter__(self):
+        registry = get_registry()
+        for post in super().__iter__():
+            registry.attach(post)
+            yield post
+
+
+class PostQuerySet(models.QuerySet):
+
+    def with_related(self):
+        queryset = self.select_related('author')
+        queryset._iterable_class = RegistryIterable
+        return queryset
+
+    def for_listing(self):
+        """Feed ordering, without the full text cards never show."""
+        return self.defer('text', 'text_html').order_by('-pub_date', '-pk')
+
+    def visible(self):
+        return self.filter(visible_posts_q()).with_related()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # Rows are inserted without save(); fill what it would.
+        objs = list(objs)
+        for post in objs:
+            post.render_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def visible_for(self, user):
+        """Visible posts plus every post of ``user`` itself."""
+        if not user.is_authenticated:
+            return self.visible()
+        return (
+            self.filter(visible_posts_q() | Q(author=user))
+            .with_related()
+        )
+
+
 class Post(published.PublishedModel):
     title = models.CharField(
         max_length=256,
@@ -95,16 +180,160 @@ class Post(published.PublishedModel):
         null=True,
         verbose_name='Изображение',
     )
+    image_width = published.WidthField(verbose_name='Ширина изображения')
+    image_height = published.HeightField(verbose_name='Высота изображения')
+    image_size = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Размер файла изображения',
+    )
+    image_color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        verbose_name='Основной цвет изображения',
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения',
+    )
+    text_html = published.RenderedTextField(verbose_name='Текст в HTML')
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Анонс',
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            # Partial rather than leading ``is_published``: Django renders
+            # ``is_published=True`` as a bare column, which SQLite matches
+            # against an index condition but cannot seek on as a key.
+            models.Index(
+                fields=('pub_date',),
+                condition=Q(is_published=True),
+                name='post_published_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=Q(is_published=True),
+                name='post_category_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def render_fields(self):
+        """Fill the fields derived from ``text``."""
+        self.excerpt = make_excerpt(self.text)
+        self.text_html = published.render_text(self.text)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.render_fields()
+        new_image = bool(self.image) and not self.image._committed
+        if new_image or not self.image:
+            self.image_variants = {}
+            self.image_color = ''
+            # Known from the upload itself, without reading storage. Not
+            # ImageField's width_field and height_field, which open the
+            # file whenever a post without them is loaded.
+            self.image_size = self.image.size if new_image else None
+            self.image_width, self.image_height = (
+                upright_size(self.image) if new_image else (None, None)
+            )
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'text' in update_fields:
+                update_fields |= {'excerpt', 'text_html'}
+            if 'image' in update_fields:
+                update_fields |= {*IMAGE_FIELDS, 'image_size'}
+        elif (
+            self.image and not new_image
+            and not self._state.adding and self.pk is not None
+        ):
+            # Keep what ``blog.image_queue`` may have stored since this
+            # instance was loaded.
+            update_fields = {
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+            } - set(IMAGE_FIELDS)
+        super().save(*args, update_fields=update_fields, **kwargs)
+        if new_image:
+            schedule_variants(self)
+
 
-class Comment(models.Model):
+class StoredFile(models.Model):
+    """References to a file kept by ``blog.storage``."""
+
+    name = models.CharField(
+        max_length=255,
+        primary_key=True,
+        verbose_name='Путь к файлу',
+    )
+    refs = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество ссылок',
+    )
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def acquire(cls, name):
+        """Count one more reference to ``name``."""
+        stored, created = (
+            cls.objects.select_for_update()
+            .get_or_create(name=name, defaults={'refs': 1})
+        )
+        if not created:
+            cls.objects.filter(name=name).update(refs=F('refs') + 1)
+
+    @classmethod
+    def release(cls, names):
+        """Drop a reference per name; return the names left unreferenced.
+
+        Files that were never counted are never reported unreferenced.
+        """
+        released = Counter(names)
+        refs = dict(
+            cls.objects.select_for_update()
+            .filter(name__in=released)
+            .values_list('name', 'refs')
+        )
+        unreferenced = [
+            name for name, count in refs.items() if count <= released[name]
+        ]
+        cls.objects.filter(name__in=unreferenced).delete()
+        by_count = {}
+        for name in refs.keys() - set(unreferenced):
+            by_count.setdefault(released[name], []).append(name)
+        for count, group in by_count.items():
+            cls.objects.filter(name__in=group).update(refs=F('refs') - count)
+        return unreferenced
+
+
+class Comment(published.TrackedModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -112,8 +341,61 @@ class Comment(models.Model):
     )
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField(blank=False)
+    text_html = published.RenderedTextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx',
+            ),
+        )
+
+    def render_fields(self):
+        """Fill the fields derived from ``text``."""
+        self.text_html = published.render_text(self.text)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.render_fields()
+        if update_fields is not None and 'text' in update_fields:
+            update_fields = {*update_fields, 'text_html'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class PostFile(models.Model):
+    """A file a post shows: its image or one of the image's variants.
+
+    Lets ``blog.media`` find the posts behind a file by an indexed name.
+    """
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='files',
+        verbose_name='Публикация',
+    )
+    name = models.CharField(
+        max_length=255,
+        db_index=True,
+        verbose_name='Путь к файлу',
+    )
+
+    class Meta:
+        verbose_name = 'файл публикации'
+        verbose_name_plural = 'Файлы публикаций'
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def record(cls, post_id, image_name, variants, replace=True):
+        """Make ``image_name`` and its variants the files of ``post_id``."""
+        if replace:
+            cls.objects.filter(post_id=post_id).delete()
+        names = ([image_name] if image_name else []) + variant_names(variants)
+        cls.objects.bulk_create(
+            cls(post_id=post_id, name=name) for name in names
+        )
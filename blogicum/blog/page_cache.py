@@ -0,0 +1,127 @@
+"""Full-page cache for anonymous reads of blog pages.
+
+Pages are cached with the versions of the tags they depend on (see
+``blog.cache``); ``blog.signals`` bumps those tags when posts, comments,
+categories, locations or users change. Scheduled posts appear without any
+write, so no page outlives the next pending publication. A page gone stale
+either way is rebuilt by one worker while the others serve the old copy.
+"""
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from . import metrics
+from .cache import invalidate_tags, tag_versions, tagged_key
+
+PAGE_CACHE_PREFIX = 'blog:page'
+# Bumped by changes that show on every page, such as category titles.
+PAGES_TAG = 'pages'
+INDEX_TAG = 'page:index'
+
+
+def category_tag(slug):
+    return f'page:category:{slug}'
+
+
+def profile_tag(username):
+    return f'page:profile:{username}'
+
+
+def post_tag(pk):
+    return f'page:post:{pk}'
+
+
+def invalidate_pages(source, *tags):
+    """Drop cached pages tagged with ``tags``, counting it for ``source``."""
+    invalidate_tags(*tags)
+    metrics.incr(f'page_cache.invalidations.{source}')
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{PAGE_CACHE_PREFIX}:{path}'
+
+
+def page_version(tags):
+    return ':'.join(tag_versions(PAGES_TAG, *tags))
+
+
+def page_etag(request, tags):
+    """Validator for a page: changes whenever the cached page would.
+
+    Costs no query unless the next scheduled publication is not cached.
+    """
+    parts = (
+        request.get_full_path(),
+        request.user.pk or '',
+        # Every page's header shows the viewer's username and profile link.
+        request.user.get_username(),
+        # Pages with forms embed the CSRF token, which changes on login.
+        request.META.get('CSRF_COOKIE', ''),
+        next_publication() or '',
+        *tag_versions(PAGES_TAG, *tags),
+    )
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def is_cacheable_request(request):
+    return (
+        settings.BLOG_PAGE_CACHE_TIMEOUT
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def is_cacheable_response(request, response):
+    # A page that used the CSRF token would hand one visitor's token to
+    # everyone, and cookies are per visitor by definition.
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def next_publication():
+    """Earliest scheduled publication still ahead, or ``None``."""
+    from .models import Post
+
+    key = tagged_key('blog:next-publication', ('posts',))
+    cached = cache.get(key)
+    now = timezone.now()
+    if cached is None or cached and cached <= now:
+        cached = (
+            Post.objects
+            .filter(is_published=True, pub_date__gt=now)
+            .order_by('pub_date')
+            .values_list('pub_date', flat=True)
+            .first()
+        ) or ''
+        cache.set(key, cached, timeout=None)
+    return cached or None
+
+
+def page_cache_timeout():
+    timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+    pending = next_publication()
+    if pending is not None:
+        until = (pending - timezone.now()).total_seconds()
+        timeout = min(timeout, max(1, math.ceil(until)))
+    return timeout
+
+
+def hit_rate():
+    """Share of page cache lookups served from the cache, or ``None``."""
+    counters = metrics.snapshot()
+    hits = (
+        counters.get('page_cache.hits', 0)
+        + counters.get('page_cache.stale', 0)
+    )
+    lookups = hits + counters.get('page_cache.misses', 0)
+    return hits / lookups if lookups else None
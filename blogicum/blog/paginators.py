@@ -0,0 +1,183 @@
+"""Paginators for post feeds."""
+import base64
+import binascii
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .cache import tagged_key
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def estimate_count(queryset):
+    """Planner row estimate for ``queryset``, or ``None`` if unavailable.
+
+    Only PostgreSQL exposes a usable estimate; other backends fall back to
+    an exact ``COUNT(*)``.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    match = re.search(r'rows=(\d+)', queryset.order_by().explain())
+    return int(match.group(1)) if match else None
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that keeps the feed total in the cache.
+
+    The total is stored under ``cache_key`` tagged with ``posts``, which is
+    invalidated whenever a post or category changes. Above
+    ``BLOG_FEED_COUNT_ESTIMATE_THRESHOLD`` rows the planner estimate is
+    used instead of counting.
+    """
+
+    def __init__(self, object_list, per_page, cache_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return super().count
+        key = tagged_key('blog:feed-count', ('posts',), self.cache_key)
+        count = cache.get(key)
+        if count is None:
+            count = estimate_count(self.object_list)
+            threshold = settings.BLOG_FEED_COUNT_ESTIMATE_THRESHOLD
+            if count is None or count < threshold:
+                count = super().count
+            cache.set(key, count, settings.BLOG_FEED_COUNT_TIMEOUT)
+        return count
+
+
+class KeysetPage:
+    """One page of a keyset-paginated feed.
+
+    Quacks like ``django.core.paginator.Page`` for templates that only
+    iterate it and ask about neighbours; there are no page numbers.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate newest-first on ``(pub_date, pk)`` without ``OFFSET``.
+
+    Cursors are opaque url-safe tokens holding the key of the boundary row
+    and the direction to read in, so every page is a single index range
+    scan no matter how deep it is.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+
+    @staticmethod
+    def encode_cursor(post, direction):
+        payload = json.dumps(
+            [direction, post.pub_date.isoformat(), post.pk],
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, pub_date, pk = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            pub_date = parse_datetime(pub_date)
+        except (binascii.Error, TypeError, ValueError):
+            raise InvalidCursor('Invalid cursor.')
+        if (
+            direction not in ('next', 'previous')
+            or pub_date is None
+            or not isinstance(pk, int)
+        ):
+            raise InvalidCursor('Invalid cursor.')
+        return direction, pub_date, pk
+
+    def page(self, cursor=None):
+        limit = self.per_page + 1
+        if not cursor:
+            rows = list(self.queryset.order_by('-pub_date', '-pk')[:limit])
+            return self._forward_page(rows, has_previous=False)
+        direction, pub_date, pk = self.decode_cursor(cursor)
+        if direction == 'next':
+            rows = list(
+                self.queryset
+                .filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, pk__lt=pk)
+                )
+                .order_by('-pub_date', '-pk')[:limit]
+            )
+            return self._forward_page(rows, has_previous=True)
+        rows = list(
+            self.queryset
+            .filter(Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk))
+            .order_by('pub_date', 'pk')[:limit]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=self.encode_cursor(rows[-1], 'next') if rows else None,
+            previous_cursor=(
+                self.encode_cursor(rows[0], 'previous')
+                if has_previous else None
+            ),
+        )
+
+    def _forward_page(self, rows, has_previous):
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=(
+                self.encode_cursor(rows[-1], 'next') if has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(rows[0], 'previous')
+                if has_previous and rows else None
+            ),
+        )
@@ -0,0 +1,91 @@
+"""In-process registry of categories and locations.
+
+Both tables are small and rarely change, so each worker keeps all their
+rows in memory instead of joining or looking them up on every request.
+The registry loads on first use and reloads once the ``registry`` cache
+tag moves; ``blog.signals`` bumps it when a category or location changes,
+which reaches every worker sharing the cache. ``RegistryMiddleware``
+makes that first use happen before a request's queries are counted
+against its view's budget.
+
+Registry objects are shared between requests and must be treated as
+read-only.
+"""
+import threading
+
+from django.db import transaction
+
+from .cache import invalidate_tags, tag_versions
+
+REGISTRY_TAG = 'registry'
+
+_lock = threading.Lock()
+_registry = None
+
+
+class Registry:
+
+    def __init__(self, version, categories, locations):
+        self.version = version
+        self.categories = {category.pk: category for category in categories}
+        self.categories_by_slug = {
+            category.slug: category for category in categories
+        }
+        self.locations = {location.pk: location for location in locations}
+        self.unpublished_category_ids = frozenset(
+            category.pk for category in categories
+            if not category.is_published
+        )
+
+    @classmethod
+    def load(cls, version):
+        from .models import Category, Location
+
+        return cls(version, list(Category.objects.all()),
+                   list(Location.objects.all()))
+
+    def published_category(self, slug):
+        category = self.categories_by_slug.get(slug)
+        if category is not None and category.is_published:
+            return category
+        return None
+
+    def attach(self, post):
+        """Set ``post.category`` and ``post.location`` without a query.
+
+        Rows missing from the registry are left for Django to fetch.
+        """
+        for field_name, objects in (
+            ('category', self.categories),
+            ('location', self.locations),
+        ):
+            field = post._meta.get_field(field_name)
+            related = objects.get(getattr(post, field.attname))
+            if related is not None:
+                field.set_cached_value(post, related)
+
+
+def get_registry():
+    global _registry
+    version, = tag_versions(REGISTRY_TAG)
+    registry = _registry
+    if registry is None or registry.version != version:
+        with _lock:
+            if _registry is None or _registry.version != version:
+                _registry = Registry.load(version)
+            registry = _registry
+    return registry
+
+
+def reload_registry():
+    """Move the registry to a new version and load it in this worker."""
+    invalidate_tags(REGISTRY_TAG)
+    return get_registry()
+
+
+def invalidate_registry():
+    # The writer reloads right away so that its next request pays nothing;
+    # other workers reload on their next request. Again once committed: a
+    # worker reloading in between would have read the old rows.
+    reload_registry()
+    transaction.on_commit(reload_registry)
@@ -0,0 +1,243 @@
+"""Cache invalidation, denormalized counters and file references."""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .cache import invalidate_tags
+from .images import release_image
+from .models import Category, Comment, Location, Post, PostFile
+from .registry import invalidate_registry
+from .page_cache import (
+    INDEX_TAG,
+    PAGES_TAG,
+    category_tag,
+    invalidate_pages,
+    post_tag,
+    profile_tag,
+)
+
+User = get_user_model()
+
+_deleting = threading.local()
+
+
+def _posts_being_deleted():
+    if not hasattr(_deleting, 'post_ids'):
+        _deleting.post_ids = set()
+    return _deleting.post_ids
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_post_counts(sender, **kwargs):
+    invalidate_tags('posts')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def render_fixture_fields(sender, instance, raw=False, **kwargs):
+    # Fixtures are saved raw, skipping save() and the fields it renders.
+    if raw:
+        instance.render_fields()
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post(sender, instance, **kwargs):
+    _posts_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance, **kwargs):
+    _posts_being_deleted().discard(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def count_added_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1, **Post.bump_fields()
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    # Comments cascading from their post's deletion need no decrement.
+    if instance.post_id in _posts_being_deleted():
+        return
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=F('comment_count') - 1, **Post.bump_fields()
+    )
+
+
+def _related_values(instance, field_name, ids, value_field):
+    """``value_field`` of the related objects ``ids``.
+
+    The object already loaded on ``instance`` is used without a query.
+    """
+    field = instance._meta.get_field(field_name)
+    ids = set(ids) - {None}
+    values = set()
+    loaded = field.get_cached_value(instance, None)
+    if loaded is not None and loaded.pk in ids:
+        ids.discard(loaded.pk)
+        values.add(getattr(loaded, value_field))
+    if ids:
+        values.update(
+            field.related_model.objects
+            .filter(pk__in=ids)
+            .values_list(value_field, flat=True)
+        )
+    return values
+
+
+@receiver(post_init, sender=Post)
+def remember_post_origin(sender, instance, **kwargs):
+    # Read __dict__ directly: touching a deferred field would query.
+    instance._page_origin = (
+        instance.__dict__.get('category_id'),
+        instance.__dict__.get('author_id'),
+    )
+    image = instance.__dict__.get('image')
+    instance._image_origin = (
+        getattr(image, 'name', image) or '',
+        instance.__dict__.get('image_variants') or {},
+    )
+
+
+def _release_image_later(storage, name, variants):
+    if name or variants:
+        transaction.on_commit(
+            lambda: release_image(storage, name, variants)
+        )
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, created, raw=False, **kwargs):
+    name, variants = instance._image_origin
+    if raw or name == (instance.image.name or ''):
+        return
+    if not created:
+        _release_image_later(instance.image.storage, name, variants)
+    # A new image has no variants until blog.image_queue builds them.
+    PostFile.record(instance.pk, instance.image.name, {}, replace=not created)
+    instance._image_origin = (instance.image.name or '', {})
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    _release_image_later(
+        instance.image.storage, instance.image.name, instance.image_variants
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_category_id, old_author_id = instance._page_origin
+    slugs = _related_values(
+        instance, 'category', {instance.category_id, old_category_id}, 'slug'
+    )
+    usernames = _related_values(
+        instance, 'author', {instance.author_id, old_author_id}, 'username'
+    )
+    invalidate_pages(
+        'post',
+        INDEX_TAG,
+        post_tag(instance.pk),
+        *map(category_tag, slugs),
+        *map(profile_tag, usernames),
+    )
+    instance._page_origin = (instance.category_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, raw=False, **kwargs):
+    # The post invalidates its own pages when it goes with its comments.
+    if raw or instance.post_id in _posts_being_deleted():
+        return
+    # Comment counts show on every feed card of the post.
+    post = instance._meta.get_field('post').get_cached_value(instance, None)
+    if post is not None:
+        slugs = _related_values(post, 'category', {post.category_id}, 'slug')
+        usernames = _related_values(
+            post, 'author', {post.author_id}, 'username'
+        )
+    else:
+        related = (
+            Post.objects
+            .filter(pk=instance.post_id)
+            .values_list('category__slug', 'author__username')
+            .first()
+        ) or (None, None)
+        slugs, usernames = {related[0]} - {None}, {related[1]} - {None}
+    tags = [
+        INDEX_TAG,
+        post_tag(instance.post_id),
+        *map(category_tag, slugs),
+        *map(profile_tag, usernames),
+    ]
+    invalidate_pages('comment', *tags)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_all_pages(sender, raw=False, **kwargs):
+    # Category titles and location names appear on every post card.
+    if not raw:
+        invalidate_registry()
+        invalidate_pages(sender._meta.model_name, PAGES_TAG)
+
+
+# User fields shown on pages: usernames everywhere, full names on profiles.
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_init, sender=User)
+def remember_user_names(sender, instance, **kwargs):
+    instance._names_origin = tuple(
+        instance.__dict__.get(field) for field in USER_NAME_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_pages(sender, instance, created, raw=False, **kwargs):
+    old_names = instance._names_origin
+    new_names = tuple(getattr(instance, field) for field in USER_NAME_FIELDS)
+    instance._names_origin = new_names
+    # Logins, passwords and new users change nothing a page shows.
+    if raw or created or old_names == new_names:
+        return
+    old_username, new_username = old_names[0], new_names[0]
+    tags = {profile_tag(old_username), profile_tag(new_username)}
+    if old_username != new_username:
+        # Cards are cached per username, but the pages around them are not.
+        posts = (
+            Post.objects
+            .filter(Q(author=instance) | Q(comments__author=instance))
+            .values_list('pk', 'category__slug', 'author_id')
+            .distinct()
+        )
+        for pk, slug, author_id in posts:
+            tags.add(post_tag(pk))
+            if author_id == instance.pk:
+                tags.add(INDEX_TAG)
+                if slug:
+                    tags.add(category_tag(slug))
+    invalidate_pages('user', *tags)
@@ -0,0 +1,43 @@
+from django import template
+
+from ..card_cache import render_post_card
+from ..images import display_size, picture
+from ..routing import fast_reverse
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_page_range(page_obj, on_each_side=2, on_ends=1):
+    """Page numbers around the current page, with ellipses for the rest."""
+    return page_obj.paginator.get_elided_page_range(
+        page_obj.number, on_each_side=on_each_side, on_ends=on_ends
+    )
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Render ``includes/post_card.html`` for ``post``, cached per version."""
+    return render_post_card(context, post)
+
+
+@register.simple_tag
+def fast_url(viewname, *args):
+    """``{% url %}`` for hot blog links, from a memoized URL template."""
+    return fast_reverse(viewname, *args)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, slot, css_class='', style=''):
+    """``post.image`` as a responsive ``<picture>`` sized for ``slot``.
+
+    Sizes come from the post's fields, so no image file is opened.
+    """
+    size = (post.image_width, post.image_height)
+    return {
+        'picture': picture(post.image, post.image_variants, slot),
+        'size': display_size(size, slot) if all(size) else None,
+        'color': post.image_color,
+        'css_class': css_class,
+        'style': style,
+    }
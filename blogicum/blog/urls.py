@@ -33,4 +33,5 @@ urlpatterns = [
         views.edit_profile,
         name='profile_edit',
     ),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -1,11 +1,14 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
+from django.core.cache import cache
 from django.core.paginator import Paginator
-from django.db.models import Prefetch, Q
-from django.http import Http404
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse, reverse_lazy
+from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from django.views.generic import (
@@ -19,102 +22,99 @@ from django.views.generic import (
 from django.views.generic.detail import SingleObjectMixin
 
 from .forms import CommentForm, PostForm, RegistrationForm
-from .models import Category, Comment, Post
+from . import metrics, page_cache
+from .mixins import FeedPaginationMixin, OwnershipMixin, PageCacheMixin
+from .models import Comment, Post
+from .registry import get_registry
 
 User = get_user_model()
 
 
-class PostListView(ListView):
+class PostListView(PageCacheMixin, FeedPaginationMixin, ListView):
 
     model = Post
     template_name = 'blog/index.html'
     context_object_name = 'post_list'
     paginate_by = 10
+    query_budget = 5
 
     def get_queryset(self):
-        return (
-            Post.objects
-            .select_related('location', 'category', 'author')
-            .prefetch_related('comments')
-            .filter(
-                Q(pub_date__lte=timezone.now())
-                & Q(is_published__exact=True)
-                & Q(category__is_published__exact=True)
-            )
-            .order_by('-pub_date')
-        )
+        return Post.objects.visible().for_listing()
+
+    def get_page_cache_tags(self):
+        return (page_cache.INDEX_TAG,)
+
+    def get_count_cache_key(self):
+        return 'index'
 
 
 index = PostListView.as_view()
 
 
-class PostDetailView(DetailView):
+class PostDetailView(PageCacheMixin, DetailView):
 
     model = Post
     template_name = 'blog/detail.html'
     context_object_name = 'post'
     pk_url_kwarg = 'id'
+    query_budget = 5
+
+    def get_page_cache_tags(self):
+        return (page_cache.post_tag(self.kwargs['id']),)
 
     def get_queryset(self):
         return (
             Post.objects
-            .select_related('location', 'category', 'author')
-            .prefetch_related('comments__author')
+            .visible_for(self.request.user)
+            .prefetch_related(
+                Prefetch(
+                    'comments',
+                    queryset=(
+                        Comment.objects
+                        .select_related('author')
+                        .order_by('created_at')
+                    ),
+                )
+            )
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
-
-        is_published = (
-            post.pub_date <= timezone.now()
-            and post.is_published
-            and post.category
-            and post.category.is_published
-        )
-        if not is_published:
-            if (
-                not self.request.user.is_authenticated
-                or self.request.user != post.author
-            ):
-                raise Http404
-
-        comment_form = CommentForm()
-        comments = post.comments.order_by('created_at')
-        context['comment_form'] = comment_form
-        context['comments'] = comments
+        context['comment_form'] = CommentForm()
+        context['comments'] = self.object.comments.all()
         return context
 
 
 post_detail = PostDetailView.as_view()
 
 
-class CategoryPostListView(ListView):
+class CategoryPostListView(PageCacheMixin, FeedPaginationMixin, ListView):
 
     model = Post
     template_name = 'blog/category.html'
     context_object_name = 'post_list'
     paginate_by = 10
+    query_budget = 6
+
+    def get_page_cache_tags(self):
+        return (page_cache.category_tag(self.kwargs['category_slug']),)
 
     def get_queryset(self):
-        self.category = get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True,
+        self.category = get_registry().published_category(
+            self.kwargs['category_slug']
         )
+        if self.category is None:
+            raise Http404('No published category matches the given slug.')
         return (
             Post.objects
-            .select_related('location', 'category', 'author')
-            .prefetch_related('comments')
-            .filter(
-                Q(pub_date__lte=timezone.now())
-                & Q(is_published__exact=True)
-                & Q(category__is_published__exact=True)
-                & Q(category__slug__exact=self.kwargs['category_slug'])
-            )
-            .order_by('-pub_date')
+            .visible()
+            .for_listing()
+            .filter(category=self.category)
         )
 
+    def get_count_cache_key(self):
+        return f'category:{self.category.pk}'
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category
@@ -124,37 +124,32 @@ class CategoryPostListView(ListView):
 category_posts = CategoryPostListView.as_view()
 
 
-class ProfileView(ListView):
+class ProfileView(PageCacheMixin, FeedPaginationMixin, ListView):
 
     model = Post
     template_name = 'blog/profile.html'
     context_object_name = 'post_list'
     paginate_by = 10
+    query_budget = 6
+
+    def get_page_cache_tags(self):
+        return (page_cache.profile_tag(self.kwargs['username']),)
 
     def get_queryset(self):
         self.profile_user = get_object_or_404(
             User, username=self.kwargs['username']
         )
 
-        posts_qs = Post.objects.filter(author=self.profile_user).select_related(
-            'location', 'category', 'author'
-        ).prefetch_related('comments')
+        return (
+            Post.objects
+            .visible_for(self.request.user)
+            .for_listing()
+            .filter(author=self.profile_user)
+        )
 
-        if (
-            self.request.user.is_authenticated
-            and self.request.user == self.profile_user
-        ):
-            return posts_qs.order_by('-pub_date')
-        else:
-            return (
-                posts_qs
-                .filter(
-                    Q(pub_date__lte=timezone.now())
-                    & Q(is_published__exact=True)
-                    & Q(category__is_published__exact=True)
-                )
-                .order_by('-pub_date')
-            )
+    def get_count_cache_key(self):
+        is_owner = self.request.user == self.profile_user
+        return f'profile:{self.profile_user.pk}:{is_owner:d}'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -175,6 +170,7 @@ class CreatePostView(CreateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
+    query_budget = 10
 
     def form_valid(self, form):
         form.instance.author = self.request.user
@@ -191,21 +187,16 @@ class CreatePostView(CreateView):
 create_post = login_required(CreatePostView.as_view())
 
 
-class EditPostView(UpdateView):
+class EditPostView(OwnershipMixin, UpdateView):
 
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
     pk_url_kwarg = 'id'
+    query_budget = 13
 
     def get_queryset(self):
-        return Post.objects.all()
-
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.author != request.user:
-            return redirect('blog:post_detail', id=obj.pk)
-        return super().dispatch(request, *args, **kwargs)
+        return Post.objects.with_related()
 
     def form_valid(self, form):
         if not form.instance.pub_date:
@@ -217,31 +208,21 @@ class EditPostView(UpdateView):
             'blog:post_detail', kwargs={'id': self.object.pk}
         )
 
-    def get_object(self, queryset=None):
-        return super().get_object(queryset)
-
 
 edit_post = login_required(EditPostView.as_view())
 
 
-class DeletePostView(DeleteView):
+class DeletePostView(OwnershipMixin, DeleteView):
 
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'id'
     success_url = reverse_lazy('blog:index')
+    allow_staff = True
+    query_budget = 10
 
     def get_queryset(self):
-        return Post.objects.all()
-
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.author != request.user and not request.user.is_staff:
-            return redirect('blog:post_detail', id=obj.pk)
-        return super().dispatch(request, *args, **kwargs)
-
-    def get_object(self, queryset=None):
-        return super().get_object(queryset)
+        return Post.objects.with_related()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -258,6 +239,10 @@ class AddCommentView(SingleObjectMixin, FormView):
     form_class = CommentForm
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'id'
+    query_budget = 5
+
+    def get_queryset(self):
+        return Post.objects.with_related()
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
@@ -267,79 +252,58 @@ class AddCommentView(SingleObjectMixin, FormView):
         comment = form.save(commit=False)
         comment.post = self.object
         comment.author = self.request.user
-        comment.save()
+        # Saving bumps Post.comment_count (see blog.signals).
+        with transaction.atomic():
+            comment.save()
         return redirect('blog:post_detail', id=self.object.pk)
 
 
 add_comment = login_required(AddCommentView.as_view())
 
 
-class EditCommentView(UpdateView):
+class CommentOwnershipMixin(OwnershipMixin):
 
     model = Comment
-    form_class = CommentForm
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_id'
 
     def get_queryset(self):
-        return Comment.objects.all()
-
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.author != request.user:
-            return redirect('blog:post_detail', id=self.kwargs.get('post_id'))
-        return super().dispatch(request, *args, **kwargs)
+        return (
+            Comment.objects
+            .select_related('post__category', 'post__author')
+            .filter(post_id=self.kwargs['post_id'])
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['post'] = get_object_or_404(
-            Post, pk=self.kwargs['post_id']
-        )
+        context['post'] = self.object.post
         return context
 
     def get_success_url(self):
         return reverse_lazy(
-            'blog:post_detail', kwargs={'id': self.object.post.pk}
+            'blog:post_detail', kwargs={'id': self.object.post_id}
         )
 
-    def get_object(self, queryset=None):
-        return super().get_object(queryset)
-
 
-edit_comment = login_required(EditCommentView.as_view())
+class EditCommentView(CommentOwnershipMixin, UpdateView):
 
+    form_class = CommentForm
+    query_budget = 4
 
-class DeleteCommentView(DeleteView):
 
-    model = Comment
-    template_name = 'blog/comment.html'
-    pk_url_kwarg = 'comment_id'
+edit_comment = login_required(EditCommentView.as_view())
 
-    def get_queryset(self):
-        return Comment.objects.all()
 
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.author != request.user and not request.user.is_staff:
-            return redirect('blog:post_detail', id=self.kwargs.get('post_id'))
-        return super().dispatch(request, *args, **kwargs)
+class DeleteCommentView(CommentOwnershipMixin, DeleteView):
 
-    def get_success_url(self):
-        return reverse_lazy(
-            'blog:post_detail', kwargs={'id': self.object.post.pk}
-        )
+    allow_staff = True
+    query_budget = 5
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['post'] = get_object_or_404(
-            Post, pk=self.kwargs['post_id']
-        )
         context['confirm_delete'] = True
         return context
 
-    def get_object(self, queryset=None):
-        return super().get_object(queryset)
-
 
 delete_comment = login_required(DeleteCommentView.as_view())
 
@@ -349,6 +313,7 @@ class RegistrationView(CreateView):
     form_class = RegistrationForm
     template_name = 'registration/registration_form.html'
     success_url = reverse_lazy('login')
+    query_budget = 4
 
 
 register = RegistrationView.as_view()
@@ -359,6 +324,7 @@ class EditProfileView(UpdateView):
     model = User
     fields = ('first_name', 'last_name', 'username', 'email')
     template_name = 'registration/registration_form.html'
+    query_budget = 5
 
     def get_object(self, queryset=None):
         user = get_object_or_404(User, username=self.kwargs['username'])
@@ -373,3 +339,13 @@ class EditProfileView(UpdateView):
 
 
 edit_profile = login_required(EditProfileView.as_view())
+
+
+@staff_member_required
+def metrics_view(request):
+    tiers = getattr(cache, 'stats', dict)()
+    return JsonResponse({
+        **metrics.snapshot(),
+        'page_cache.hit_rate': page_cache.hit_rate(),
+        **{f'cache.{name}': value for name, value in tiers.items()},
+    })
@@ -38,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.RegistryMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,6 +77,38 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': 'blogicum',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'JOURNAL': 'journal',
+            'LOCAL_TIMEOUT': 5,
+            'POLL_INTERVAL': 1,
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    # The file cache culls a random third of its entries once full, tag
+    # versions included, and lists its directory on every write; prefer
+    # memcached or redis, which evict the least recently used keys.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+    # Holds at most 1000 notices (see core.cache_backends), so never culls.
+    'journal': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'journal',
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +148,14 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+DEFAULT_FILE_STORAGE = 'blog.storage.ContentAddressedStorage'
+# How blog.media hands files to the front-end server: 'x-accel-redirect'
+# (nginx, internal location at BLOG_MEDIA_INTERNAL_URL), 'x-sendfile'
+# (Apache, lighttpd), or '' to send them from Django.
+BLOG_MEDIA_OFFLOAD = ''
+BLOG_MEDIA_INTERNAL_URL = '/internal-media/'
+# Browser cache lifetime of media not named by content, in seconds.
+BLOG_MEDIA_MAX_AGE = 60 * 60
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
@@ -121,5 +163,19 @@ EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 LOGIN_REDIRECT_URL = 'blog:index'
 LOGIN_URL = '/auth/login/'
 
+QUERY_BUDGET_STRICT = DEBUG
+
+BLOG_KEYSET_PAGINATION = False
+BLOG_FEED_COUNT_TIMEOUT = 60
+BLOG_FEED_COUNT_ESTIMATE_THRESHOLD = 100000
+BLOG_PAGE_CACHE_TIMEOUT = 300
+BLOG_POST_CARD_TIMEOUT = 60 * 60 * 24
+# How long a stale page or card may still be served while it is rebuilt,
+# and how long one worker may take to rebuild it.
+BLOG_CACHE_STALE_TIMEOUT = 60
+BLOG_CACHE_LEASE_TIMEOUT = 10
+# Threads resizing uploaded images; with 0, build_image_variants does it.
+BLOG_IMAGE_WORKERS = 2
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -14,11 +14,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 
 from blog import views as blog_views
+from blog.media import serve_media
 
 handler403 = 'blogicum.views.csrf_failure'
 handler404 = 'blogicum.views.page_not_found'
@@ -30,9 +30,9 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/registration/', blog_views.register, name='registration'),
     path('pages/', include('pages.urls')),
+    re_path(
+        r'^{}(?P<path>.*)$'.format(settings.MEDIA_URL.lstrip('/')),
+        serve_media,
+        name='media',
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
@@ -0,0 +1,226 @@
+"""Two-tier cache: a per-process LRU in front of a shared cache.
+
+Reads try the worker's own memory first and fall back to the shared cache
+configured under ``OPTIONS['SHARED']``; writes and deletes go through both
+tiers. Every write is also recorded in a journal, which other workers poll
+at most every ``POLL_INTERVAL`` seconds to evict the keys they hold. A
+value lives in worker memory for ``LOCAL_TIMEOUT`` seconds at most, which
+also bounds staleness if a journal notice is lost: the journal counter is
+only atomic on backends with an atomic ``incr()``, such as memcached or
+redis.
+
+The journal is kept in the cache configured under ``OPTIONS['JOURNAL']``,
+the shared one by default. A cache of its own keeps notices from filling
+the shared tier, whose culling would drop the journal counter and make
+every worker clear its local tier. Only the last ``JOURNAL_MAX_READ``
+notices are kept, so that cache never fills up.
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+JOURNAL_KEY = 'two-tier:journal'
+JOURNAL_TIMEOUT = 300
+# Past this many unseen notices a worker drops its whole local tier.
+JOURNAL_MAX_READ = 1000
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """Process-wide LRU tier shared by the per-thread backend instances."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.seen = None
+        self.own_notices = set()
+        self.synced_at = 0.0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def evict(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TwoTierCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options['SHARED']
+        self.journal_alias = options.get('JOURNAL', self.shared_alias)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.poll_interval = options.get('POLL_INTERVAL', 1)
+        with _stores_lock:
+            self.local = _stores.setdefault(
+                location, LocalStore(options.get('MAX_ENTRIES', 1000))
+            )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    @property
+    def journal(self):
+        return caches[self.journal_alias]
+
+    def stats(self):
+        """Hit and miss counts of both tiers in this process."""
+        with self.local.lock:
+            return dict(self.local.stats)
+
+    def _count(self, name):
+        with self.local.lock:
+            self.local.stats[name] += 1
+
+    def _local_timeout(self, timeout):
+        if timeout is None:
+            return self.local_timeout
+        return min(self.local_timeout, timeout)
+
+    def _remember(self, key, value, timeout, version):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            self.local.evict(self.make_key(key, version))
+            return
+        self.local.set(
+            self.make_key(key, version),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self._local_timeout(timeout),
+        )
+
+    def _notify(self, key, version):
+        """Tell other workers to drop their copy of ``key``."""
+        journal = self.journal
+        try:
+            notice = journal.incr(JOURNAL_KEY)
+        except ValueError:
+            journal.add(JOURNAL_KEY, 0, timeout=None)
+            notice = journal.incr(JOURNAL_KEY)
+        with self.local.lock:
+            self.local.own_notices.add(notice)
+        journal.set(
+            f'{JOURNAL_KEY}:{notice}',
+            self.make_key(key, version),
+            JOURNAL_TIMEOUT,
+        )
+        # Workers further behind than this clear their local tier instead
+        # of reading notices.
+        journal.delete(f'{JOURNAL_KEY}:{notice - JOURNAL_MAX_READ}')
+
+    def _sync(self):
+        """Apply journal notices from other workers, at most once a poll."""
+        local = self.local
+        now = time.monotonic()
+        if now - local.synced_at < self.poll_interval:
+            return
+        local.synced_at = now
+        latest = self.journal.get(JOURNAL_KEY)
+        with local.lock:
+            seen, local.seen = local.seen, latest
+            own = local.own_notices
+            # Keep this worker's notices that are newer than ``latest``.
+            local.own_notices = {n for n in own if n > (latest or 0)}
+        if seen is None or latest == seen:
+            return
+        if latest is None or latest < seen or latest - seen > JOURNAL_MAX_READ:
+            local.clear()
+            return
+        unseen = [n for n in range(seen + 1, latest + 1) if n not in own]
+        notices = self.journal.get_many(
+            [f'{JOURNAL_KEY}:{n}' for n in unseen]
+        )
+        if len(notices) < len(unseen):
+            local.clear()
+        else:
+            local.evict(*notices.values())
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        value = self.local.get(self.make_key(key, version))
+        if value is not None:
+            self._count('local_hits')
+            return pickle.loads(value)
+        self._count('local_misses')
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            self._count('shared_misses')
+            return default
+        self._count('shared_hits')
+        self._remember(key, value, None, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._remember(key, value, timeout, version)
+        self._notify(key, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self._remember(key, value, timeout, version)
+        self._notify(key, version)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.evict(self.make_key(key, version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.evict(self.make_key(key, version))
+        deleted = self.shared.delete(key, version=version)
+        self._notify(key, version)
+        return deleted
+
+    def has_key(self, key, version=None):
+        self._sync()
+        return (
+            self.local.get(self.make_key(key, version)) is not None
+            or self.shared.has_key(key, version=version)  # noqa: W601
+        )
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.local.evict(self.make_key(key, version))
+        self._notify(key, version)
+        return value
+
+    def clear(self):
+        # Clearing the journal makes every other worker clear its local
+        # tier on its next poll.
+        self.local.clear()
+        self.shared.clear()
+        if self.journal_alias != self.shared_alias:
+            self.journal.clear()
@@ -1,7 +1,133 @@
 from django.db import models
+from django.template.defaultfilters import linebreaksbr
+from django.utils import timezone
+from django.utils.safestring import mark_safe
 
 
-class PublishedModel(models.Model):
+def render_text(text):
+    """Escape user text and keep its line breaks, as ``linebreaksbr``."""
+    return linebreaksbr(text, autoescape=True)
+
+
+class RenderedTextField(models.TextField):
+    """HTML rendered from a user text field; read back as safe markup."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        return mark_safe(value)
+
+
+class UpdatedAtField(models.DateTimeField):
+    """Time of the last save, indexed for incremental reads.
+
+    Works as ``auto_now``, but with a default: raw saves, such as
+    ``loaddata`` of a fixture without the field, skip ``pre_save()``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', timezone.now)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('db_index', True)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = timezone.now()
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class VersionField(models.PositiveBigIntegerField):
+    """Row version, incremented by every save.
+
+    Updates increment the stored number in SQL, like ``bump_fields()``,
+    so concurrent writers never hand out the same version twice. The
+    instance reads the new number back when it is next accessed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', 0)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        if add:
+            value = getattr(model_instance, self.attname)
+            if hasattr(value, 'resolve_expression'):
+                # An update of a missing row fell back to an insert.
+                value = self.get_default()
+            value += 1
+        else:
+            value = models.F(self.attname) + 1
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class DimensionField(models.PositiveIntegerField):
+    """Size of an image in pixels, filled in when the image is stored."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('null', True)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+
+class WidthField(DimensionField):
+    """Width of an image, upright."""
+
+
+class HeightField(DimensionField):
+    """Height of an image, upright."""
+
+
+class TrackedModel(models.Model):
+    """Абстрактная модель. Отслеживает время и номер версии изменения."""
+
+    updated_at = UpdatedAtField(verbose_name='Изменено')
+    version = VersionField(db_index=True, verbose_name='Версия')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if self.pk is None:
+            # Model.save() would try to update the loaded fields of a
+            # deleted row whose version is still to be read back.
+            self.__dict__.setdefault(
+                'version', self._meta.get_field('version').get_default()
+            )
+        elif update_fields is None and not self._state.adding:
+            deferred = self.get_deferred_fields()
+            if deferred:
+                # Model.save() would only write the loaded fields, which
+                # leaves out the version read back after the last save.
+                update_fields = {
+                    field.attname for field in self._meta.concrete_fields
+                    if not field.primary_key
+                } - deferred
+        # pre_save() only applies to the fields being written.
+        if update_fields is not None:
+            update_fields = {*update_fields, 'updated_at', 'version'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+        if hasattr(self.__dict__.get('version'), 'resolve_expression'):
+            # Deferred: loaded from the database on first access.
+            del self.__dict__['version']
+
+    @classmethod
+    def bump_fields(cls):
+        """Update kwargs marking rows changed by ``QuerySet.update()``."""
+        return {
+            'updated_at': timezone.now(),
+            'version': models.F('version') + 1,
+        }
+
+
+class PublishedModel(TrackedModel):
     """Абстрактная модель. Добвляет флаг is_published."""
 
     is_published = models.BooleanField(default=True, null=False,
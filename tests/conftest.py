@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -37,10 +38,20 @@ TitledUrlRepr = TypeVar("TitledUrlRepr", bound=Tuple[UrlRepr, str])
 
 @pytest.fixture(autouse=True)
 def enable_debug_false():
-    with override_settings(DEBUG=False):
+    # The in-memory test database cannot take writes from image workers.
+    with override_settings(
+        DEBUG=False, QUERY_BUDGET_STRICT=True, BLOG_IMAGE_WORKERS=0
+    ):
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
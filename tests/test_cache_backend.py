@@ -0,0 +1,52 @@
+from django.core.cache import caches
+
+from core import cache_backends
+from core.cache_backends import TwoTierCache
+
+
+def _worker(name):
+    return TwoTierCache(
+        f"test-{name}", {"OPTIONS": {"SHARED": "shared", "POLL_INTERVAL": 0}}
+    )
+
+
+def test_two_tier_cache_invalidates_other_workers():
+    first, second = _worker("first"), _worker("second")
+    first.set("feed", "v1")
+    assert second.get("feed") == "v1"
+    assert second.get("feed") == "v1"
+    assert second.stats() == {
+        "local_misses": 1, "shared_hits": 1, "local_hits": 1,
+    }, "Убедитесь, что повторное чтение берётся из памяти процесса."
+
+    first.set("feed", "v2")
+    assert second.get("feed") == "v2", (
+        "Убедитесь, что запись в одном процессе сбрасывает локальную копию"
+        " значения в других процессах."
+    )
+    first.delete("feed")
+    assert second.get("feed") is None
+    assert first.get("feed", "missing") == "missing"
+
+
+def test_journal_is_kept_apart_and_trimmed(monkeypatch):
+    monkeypatch.setattr(cache_backends, "JOURNAL_MAX_READ", 3)
+    options = {"SHARED": "shared", "JOURNAL": "journal", "POLL_INTERVAL": 0}
+    first = TwoTierCache("test-journal-first", {"OPTIONS": options})
+    second = TwoTierCache("test-journal-second", {"OPTIONS": options})
+    first.clear()
+    first.set("feed", "v1")
+    assert second.get("feed") == "v1"
+    for n in range(5):
+        first.set(f"card:{n}", n)
+    first.set("feed", "v2")
+    assert second.get("feed") == "v2"
+
+    journal_key = cache_backends.JOURNAL_KEY
+    assert caches["shared"].get(journal_key) is None, (
+        "Убедитесь, что журнал записей не занимает место в общем кеше."
+    )
+    notices = caches["journal"].get_many(
+        [f"{journal_key}:{n}" for n in range(1, 8)]
+    )
+    assert sorted(notices) == [f"{journal_key}:{n}" for n in (5, 6, 7)]
@@ -0,0 +1,30 @@
+from django.core.cache import cache
+
+from blog.cache import LEASE_SUFFIX, get_or_rebuild
+
+
+def test_stale_value_is_served_while_rebuilding():
+    assert get_or_rebuild("feed", "v1", lambda: "page v1", 60) == "page v1"
+    assert get_or_rebuild("feed", "v1", lambda: "unused", 60) == "page v1"
+
+    # Another worker holds the lease and is rebuilding the feed.
+    cache.add("feed" + LEASE_SUFFIX, 1)
+    assert get_or_rebuild("feed", "v2", lambda: "page v2", 60) == (
+        "page v1"
+    ), (
+        "Убедитесь, что пока другой процесс пересобирает значение,"
+        " отдаётся устаревшее."
+    )
+
+    cache.delete("feed" + LEASE_SUFFIX)
+    assert get_or_rebuild("feed", "v2", lambda: "page v2", 60) == "page v2"
+    assert cache.get("feed" + LEASE_SUFFIX) is None
+
+
+def test_value_is_refreshed_before_expiry(monkeypatch):
+    get_or_rebuild("feed", "v1", lambda: "page v1", 60)
+    monkeypatch.setattr("blog.cache.random.random", lambda: 0.5)
+    monkeypatch.setattr("blog.cache.EARLY_REFRESH_BETA", 1e12)
+    assert get_or_rebuild("feed", "v1", lambda: "page v2", 60) == (
+        "page v2"
+    ), "Убедитесь, что значение может обновляться заранее, до истечения."
@@ -0,0 +1,34 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post
+from conftest import N_PER_FIXTURE
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(N_PER_FIXTURE).blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    post.refresh_from_db()
+    assert post.comment_count == N_PER_FIXTURE + 1, (
+        "Убедитесь, что счётчик комментариев публикации растёт при"
+        " добавлении комментария."
+    )
+
+    comments[0].delete()
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == N_PER_FIXTURE - 1, (
+        "Убедитесь, что счётчик комментариев публикации уменьшается при"
+        " удалении комментария, в том числе каскадном."
+    )
+
+    Post.objects.filter(pk=post.pk).update(comment_count=100)
+    call_command("recount_comments", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == N_PER_FIXTURE - 1
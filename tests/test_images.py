@@ -0,0 +1,168 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+from blog.image_queue import build_variants
+from blog.models import Post
+from blog.storage import ContentAddressedStorage
+
+
+def _photo(width, height, name="photo.jpg"):
+    data = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        data, format="JPEG"
+    )
+    return ImageFile(data, name=name)
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_post_image_variants(client, mixer, media_root, published_category):
+    post = mixer.blend(
+        "blog.Post",
+        is_published=True,
+        pub_date=timezone.now(),
+        category=published_category,
+        image=_photo(1600, 800),
+    )
+    assert post.image_variants == {}
+    content = client.get("/").content.decode("utf-8")
+    assert "image-placeholder.svg" in content, (
+        "Убедитесь, что пока копии изображения не готовы, в карточке"
+        " выводится заглушка."
+    )
+    assert post.image.url not in content
+    build_variants(post.pk, post.image.name)
+
+    variants = Post.objects.get(pk=post.pk).image_variants
+    assert [w for w, _, _ in variants["webp"]] == [200, 400, 800], (
+        "Убедитесь, что для изображения публикации создаются уменьшенные"
+        " копии для карточки и страницы публикации."
+    )
+    assert [h for _, h, _ in variants["jpeg"]] == [100, 200, 400]
+    for extension in ("webp", "jpeg"):
+        for _, _, name in variants[extension]:
+            assert (media_root / name).is_file()
+
+    content = client.get("/").content.decode("utf-8")
+    assert 'type="image/webp"' in content
+    assert 'width="200" height="100"' in content, (
+        "Убедитесь, что карточка задаёт размеры изображения и srcset."
+    )
+    assert post.image.url not in content
+
+    post.image = _photo(100, 300)
+    post.save()
+    build_variants(post.pk, post.image.name)
+    post.refresh_from_db()
+    assert [w for w, _, _ in post.image_variants["webp"]] == [100], (
+        "Убедитесь, что изображения не увеличиваются."
+    )
+    post.image = None
+    post.save()
+    assert post.image_variants == {}
+
+
+@pytest.mark.django_db
+def test_build_image_variants_command(mixer, media_root):
+    post = mixer.blend("blog.Post", image=_photo(500, 500))
+
+    call_command("build_image_variants", stdout=StringIO())
+    post.refresh_from_db()
+    assert [w for w, _, _ in post.image_variants["jpeg"]] == [200, 400, 500]
+
+
+@pytest.mark.django_db
+def test_identical_images_are_stored_once(
+        mixer, media_root, django_capture_on_commit_callbacks
+):
+    first, second = mixer.cycle(2).blend(
+        "blog.Post", image=(_photo(300, 200, f"{name}.jpg") for name in "ab")
+    )
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые изображения сохраняются в одном файле."
+    )
+    assert first.image.name.startswith("posts/")
+    path = media_root / first.image.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert path.is_file()
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not path.is_file(), (
+        "Убедитесь, что файл удаляется вместе с последней ссылкой на него."
+    )
+
+
+@pytest.mark.django_db
+def test_image_metadata_is_stored(
+        client, mixer, media_root, published_category, monkeypatch
+):
+    post = mixer.blend(
+        "blog.Post",
+        is_published=True,
+        pub_date=timezone.now(),
+        category=published_category,
+        image=_photo(800, 600),
+    )
+    post = Post.objects.get(pk=post.pk)
+    assert (post.image_width, post.image_height) == (800, 600), (
+        "Убедитесь, что размеры изображения сохраняются в публикации."
+    )
+    assert post.image_size == post.image.size
+    build_variants(post.pk, post.image.name)
+    color = Post.objects.get(pk=post.pk).image_color
+    assert color.startswith("#4") and len(color) == 7, (
+        "Убедитесь, что для изображения сохраняется его основной цвет."
+    )
+
+    def no_file_access(self, name, mode="rb"):
+        raise AssertionError(
+            "Убедитесь, что при выводе публикаций файлы изображений не"
+            " открываются."
+        )
+
+    monkeypatch.setattr(ContentAddressedStorage, "_open", no_file_access)
+    content = client.get(f"/posts/{post.pk}/").content.decode("utf-8")
+    assert 'width="400" height="300"' in content
+    assert f"background-color:{color}" in content
+
+    Post.objects.filter(pk=post.pk).update(
+        image_width=None, image_height=None, image_size=None, image_color=""
+    )
+    monkeypatch.undo()
+    call_command("backfill_image_metadata", stdout=StringIO())
+    post = Post.objects.get(pk=post.pk)
+    assert (post.image_width, post.image_height, post.image_color) == (
+        800, 600, color
+    )
+    assert post.image_size
+
+
+@pytest.mark.django_db
+def test_missing_image_file_does_not_break_feeds(
+        client, mixer, media_root, post_with_published_location
+):
+    # A legacy row: an image name, no stored size and no file behind it.
+    Post.objects.filter(pk=post_with_published_location.pk).update(
+        image="posts/legacy.jpg", image_width=None, image_height=None
+    )
+    assert client.get("/").status_code == 200, (
+        "Убедитесь, что публикация с отсутствующим файлом изображения не"
+        " ломает ленту."
+    )
+    stderr = StringIO()
+    call_command(
+        "backfill_image_metadata", stdout=StringIO(), stderr=stderr
+    )
+    assert "legacy.jpg" in stderr.getvalue()
@@ -0,0 +1,103 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.files.base import ContentFile
+from django.utils.http import http_date
+
+from blog.models import Post, PostFile
+from blog.storage import ContentAddressedStorage
+
+
+def _store(content):
+    return ContentAddressedStorage().save("posts/photo.jpg", content)
+
+
+@pytest.fixture
+def stored_name(settings, tmp_path, post_with_published_location):
+    settings.MEDIA_ROOT = tmp_path
+    name = _store(ContentFile(b"0123456789"))
+    Post.objects.filter(pk=post_with_published_location.pk).update(
+        image=name
+    )
+    PostFile.record(post_with_published_location.pk, name, {})
+    return name
+
+
+def _body(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_media_is_served_with_ranges(client, stored_name):
+    url = f"/media/{stored_name}"
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert _body(response) == b"0123456789"
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что файлы с адресом по содержимому кешируются навсегда."
+    )
+
+    response = client.get(url, HTTP_RANGE="bytes=2-5")
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT, (
+        "Убедитесь, что медиафайлы отдаются по частям по заголовку Range."
+    )
+    assert response["Content-Range"] == "bytes 2-5/10"
+    assert _body(response) == b"2345"
+    assert _body(client.get(url, HTTP_RANGE="bytes=-3")) == b"789"
+    assert client.get(url, HTTP_RANGE="bytes=20-").status_code == (
+        HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    )
+
+    response = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(0))
+    assert response.status_code == HTTPStatus.OK
+
+    for path in ("posts/missing.jpg", ".staging/x", "../settings.py"):
+        assert client.get(f"/media/{path}").status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+
+@pytest.mark.django_db
+def test_media_is_offloaded(client, settings, stored_name):
+    settings.BLOG_MEDIA_OFFLOAD = "x-accel-redirect"
+    response = client.get(f"/media/{stored_name}")
+    assert response["X-Accel-Redirect"] == f"/internal-media/{stored_name}", (
+        "Убедитесь, что передача медиафайлов поручается веб-серверу."
+    )
+    assert response.content == b""
+
+    settings.BLOG_MEDIA_OFFLOAD = "x-sendfile"
+    response = client.get(f"/media/{stored_name}")
+    assert response["X-Sendfile"] == str(settings.MEDIA_ROOT / stored_name)
+
+
+@pytest.mark.django_db
+def test_media_of_hidden_posts_is_not_served(
+        client, user_client, user, mixer, stored_name,
+        post_with_published_location
+):
+    post = post_with_published_location
+    variant = _store(ContentFile(b"variant"))
+    variants = {"width": 1, "height": 1, "jpeg": [[1, 1, variant]]}
+    Post.objects.filter(pk=post.pk).update(image_variants=variants)
+    PostFile.record(post.pk, stored_name, variants)
+    assert client.get(f"/media/{variant}").status_code == HTTPStatus.OK
+
+    Post.objects.filter(pk=post.pk).update(is_published=False, author=user)
+    for name in (stored_name, variant):
+        assert client.get(f"/media/{name}").status_code == (
+            HTTPStatus.NOT_FOUND
+        ), (
+            "Убедитесь, что изображения скрытых публикаций доступны только"
+            " их автору."
+        )
+    response = user_client.get(f"/media/{stored_name}")
+    assert response.status_code == HTTPStatus.OK
+    assert "private" in response["Cache-Control"]
+
+    orphan = _store(ContentFile(b"orphan"))
+    assert client.get(f"/media/{orphan}").status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,175 @@
+import datetime
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from blog import metrics
+from blog.page_cache import page_cache_timeout
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(
+        client, user_client, django_assert_num_queries, mixer,
+        post_with_published_location
+):
+    post = post_with_published_location
+    metrics.reset()
+    urls = (
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    for url in urls:
+        client.get(url)
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+    assert metrics.snapshot()["page_cache.hits"] == len(urls)
+
+    comment = mixer.blend("blog.Comment", post=post)
+    responses = [client.get(url) for url in urls]
+    assert metrics.snapshot()["page_cache.hits"] == len(urls), (
+        "Убедитесь, что добавление комментария сбрасывает кеш всех страниц,"
+        " где выводится публикация."
+    )
+    assert comment.text_html in responses[1].content.decode("utf-8")
+
+    post.category.title = "Новое название категории"
+    post.category.save()
+    assert post.category.title in client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что изменение категории сбрасывает кеш страниц."
+    )
+
+    # Session, user, post and comments: signed-in users bypass the cache.
+    with django_assert_num_queries(4):
+        user_client.get(f"/posts/{post.id}/")
+
+
+@pytest.mark.django_db
+def test_page_cache_expires_at_next_publication(
+        settings, mixer, post_with_published_location
+):
+    mixer.blend(
+        "blog.Post",
+        pub_date=timezone.now() + datetime.timedelta(seconds=30),
+        is_published=True,
+    )
+    assert 0 < page_cache_timeout() <= 30 < settings.BLOG_PAGE_CACHE_TIMEOUT
+
+
+@pytest.mark.django_db
+def test_metrics_are_staff_only(client, user_client, admin_client):
+    assert client.get("/metrics/").status_code == HTTPStatus.FOUND
+    assert user_client.get("/metrics/").status_code == HTTPStatus.FOUND
+    response = admin_client.get("/metrics/")
+    assert response.status_code == HTTPStatus.OK
+    assert "page_cache.hit_rate" in response.json()
+
+
+def _rendered_cards(response):
+    return [t.name for t in response.templates].count(
+        "includes/post_card.html"
+    )
+
+
+@pytest.mark.django_db
+def test_post_cards_are_cached(
+        user_client, another_user_client, many_posts_with_published_locations
+):
+    user_client.get("/")
+    response = user_client.get("/")
+    assert _rendered_cards(response) == 0, (
+        "Убедитесь, что карточки публикаций берутся из кеша фрагментов."
+    )
+
+    # Only the author sees the edit link, so readers get their own cards.
+    response = another_user_client.get("/")
+    assert _rendered_cards(response) == len(response.context["page_obj"])
+    assert "Редактировать" not in response.content.decode("utf-8")
+
+    post = response.context["page_obj"][0]
+    post.title = "Новый заголовок публикации"
+    post.save()
+    response = user_client.get("/")
+    assert _rendered_cards(response) == 1, (
+        "Убедитесь, что при изменении публикации перерисовывается только её"
+        " карточка."
+    )
+    assert post.title in response.content.decode("utf-8")
+
+
+@pytest.mark.django_db
+def test_unchanged_pages_are_not_modified(
+        client, user_client, django_assert_num_queries,
+        post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/category/{post.category.slug}/"
+    etag = client.get(url)["ETag"]
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что неизменившаяся страница отдаётся с кодом 304."
+    )
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK
+    ), "Убедитесь, что ETag страницы зависит от пользователя."
+
+    user_etag = user_client.get(url)["ETag"]
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=user_etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+
+    post.title = "Новый заголовок публикации"
+    post.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK
+    ), "Убедитесь, что ETag страницы меняется при изменении публикации."
+
+
+@pytest.mark.django_db
+def test_user_changes_invalidate_only_their_pages(
+        client, django_user_model, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    other = mixer.blend("blog.Post", category=post.category)
+    index_url, other_url = "/", f"/posts/{other.id}/"
+    for url in (index_url, other_url):
+        client.get(url)
+
+    django_user_model.objects.create_user(username="newcomer", password="x")
+    post.author.set_password("new password")
+    post.author.save()
+    metrics.reset()
+    for url in (index_url, other_url):
+        client.get(url)
+    assert metrics.snapshot()["page_cache.hits"] == 2, (
+        "Убедитесь, что регистрация и смена пароля не сбрасывают кеш"
+        " страниц."
+    )
+
+    post.author.username = "renamed"
+    post.author.save()
+    assert "@renamed" in client.get(index_url).content.decode("utf-8"), (
+        "Убедитесь, что смена имени пользователя сбрасывает кеш страниц"
+        " с его публикациями."
+    )
+    client.get(other_url)
+    assert metrics.snapshot()["page_cache.hits"] == 3
+
+
+@pytest.mark.django_db
+def test_renamed_viewer_gets_a_fresh_page(client, django_user_model):
+    user = django_user_model.objects.create_user(username="alice")
+    client.force_login(user)
+    etag = client.get("/")["ETag"]
+    user.username = "bob"
+    user.save()
+    response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что ETag страницы меняется при смене имени"
+        " пользователя, который её смотрит."
+    )
+    assert "/profile/bob/" in response.content.decode("utf-8")
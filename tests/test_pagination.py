@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from conftest import N_PER_PAGE
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_pagination(user_client, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations
+    expected_ids = [
+        post.id for post in sorted(
+            posts, key=lambda post: (post.pub_date, post.id), reverse=True
+        )
+    ]
+    url = f"/profile/{posts[0].author.username}/"
+
+    seen_ids = []
+    pages = []
+    cursor = None
+    while True:
+        response = user_client.get(url, {"cursor": cursor} if cursor else {})
+        assert response.status_code == HTTPStatus.OK
+        page = response.context["page_obj"]
+        assert len(page) <= N_PER_PAGE
+        pages.append([post.id for post in page])
+        seen_ids.extend(pages[-1])
+        if not page.has_next():
+            break
+        cursor = page.next_cursor
+    assert seen_ids == expected_ids, (
+        "Убедитесь, что при курсорной пагинации публикации выводятся без"
+        " пропусков и повторов, «от новых к старым»."
+    )
+
+    response = user_client.get(url, {"cursor": page.previous_cursor})
+    assert [post.id for post in response.context["page_obj"]] == pages[-2], (
+        "Убедитесь, что ссылка на предыдущую страницу курсорной пагинации"
+        " возвращает предыдущую страницу."
+    )
+
+    response = user_client.get(url, {"cursor": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+def test_feed_count_is_cached(
+        client, django_assert_num_queries, mixer,
+        many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    url = f"/category/{posts[0].category.slug}/"
+    response = client.get(url)
+    assert response.context["paginator"].count == len(posts)
+
+    # Only the page of posts: the category comes from the registry.
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.context["paginator"].count == len(posts), (
+        "Убедитесь, что общее число публикаций берётся из кеша."
+    )
+
+    mixer.blend(
+        "blog.Post",
+        author=posts[0].author,
+        category=posts[0].category,
+        pub_date=posts[0].pub_date,
+    )
+    response = client.get(url)
+    assert response.context["paginator"].count == len(posts) + 1, (
+        "Убедитесь, что кеш числа публикаций сбрасывается при добавлении"
+        " публикации."
+    )
@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import escape
+
+from blog.budgets import assert_query_budget
+from blog.models import Post
+from conftest import N_PER_FIXTURE
+
+
+@pytest.mark.django_db
+def test_post_detail_queries(
+        client, django_assert_num_queries, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(N_PER_FIXTURE).blend("blog.Comment", post=post)
+
+    # The post, its comments and, to bound the page cache timeout, the
+    # next scheduled publication.
+    with django_assert_num_queries(3):
+        response = client.get(f"/posts/{post.id}/")
+    assert [comment.id for comment in response.context["comments"]] == [
+        comment.id for comment in sorted(comments, key=lambda c: c.created_at)
+    ], (
+        "Убедитесь, что комментарии на странице публикации выводятся"
+        " в порядке их создания."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_write_path_queries(
+        django_assert_num_queries, mixer, user, user_client,
+        post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    edit_url = f"/posts/{post.id}/edit_comment/{comment.id}/"
+    delete_url = f"/posts/{post.id}/delete_comment/{comment.id}/"
+
+    # Session, user and the comment joined with its post.
+    with django_assert_num_queries(3):
+        user_client.get(edit_url)
+    with django_assert_num_queries(3):
+        user_client.get(delete_url)
+    # Plus the DELETE and the Post.comment_count decrement.
+    with django_assert_num_queries(5):
+        user_client.post(delete_url)
+
+
+@pytest.mark.django_db
+def test_feed_query_budgets(
+        client, user_client, mixer, many_posts_with_published_locations
+):
+    post = many_posts_with_published_locations[0]
+    mixer.cycle(N_PER_FIXTURE).blend("blog.Comment", post=post)
+    urls = (
+        "/",
+        "/?page=2",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    for test_client in (client, user_client):
+        for url in urls:
+            assert_query_budget(test_client, url)
+
+
+@pytest.mark.django_db
+def test_feed_does_not_load_post_text(
+        client, many_posts_with_published_locations
+):
+    post = Post.objects.visible().for_listing().first()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/")
+    assert '"blog_post"."text"' not in context.captured_queries[-1]["sql"], (
+        "Убедитесь, что лента не загружает полный текст публикаций."
+    )
+    assert escape(post.excerpt) in response.content.decode("utf-8")
@@ -0,0 +1,44 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import registry
+
+
+@pytest.mark.django_db
+def test_feeds_take_categories_and_locations_from_registry(
+        user_client, many_posts_with_published_locations
+):
+    post = many_posts_with_published_locations[0]
+    url = f"/category/{post.category.slug}/"
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    sql = "\n".join(query["sql"] for query in context.captured_queries)
+    assert '"blog_category"' not in sql and '"blog_location"' not in sql, (
+        "Убедитесь, что категории и местоположения публикаций берутся из"
+        " реестра, без запросов и JOIN к их таблицам."
+    )
+    assert post.location.name in response.content.decode("utf-8")
+
+    post.category.is_published = False
+    post.category.save()
+    assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что реестр категорий обновляется при их изменении."
+    )
+    assert not user_client.get("/").context["page_obj"].object_list
+
+
+@pytest.mark.django_db
+def test_registry_reload_is_outside_query_budgets(
+        user_client, many_posts_with_published_locations
+):
+    # A fresh worker, or one whose registry another worker invalidated.
+    registry._registry = None
+    assert user_client.get("/").status_code == HTTPStatus.OK, (
+        "Убедитесь, что загрузка реестра не учитывается в бюджете запросов"
+        " страницы."
+    )
+    assert registry._registry is not None
@@ -0,0 +1,23 @@
+import pytest
+from django.urls import clear_script_prefix, reverse, set_script_prefix
+
+from blog.routing import fast_reverse
+
+
+@pytest.mark.parametrize("prefix", ["/", "/blog/"])
+@pytest.mark.parametrize(
+    ("viewname", "args"),
+    [
+        ("blog:index", ()),
+        ("blog:post_detail", (42,)),
+        ("blog:category_posts", ("travel-notes",)),
+        ("blog:profile", ("user.name@site",)),
+        ("blog:edit_comment", (1, 2)),
+    ],
+)
+def test_fast_reverse_matches_reverse(prefix, viewname, args):
+    set_script_prefix(prefix)
+    try:
+        assert fast_reverse(viewname, *args) == reverse(viewname, args=args)
+    finally:
+        clear_script_prefix()
@@ -0,0 +1,105 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Q
+from django.utils.html import escape
+
+from blog.models import Comment, Post, make_excerpt
+
+DB_JSON = Path(__file__).resolve().parent.parent / "db.json"
+
+
+@pytest.mark.django_db
+def test_text_html_rendered_on_save(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = "<b>Первая</b>\nвторая"
+    post.save(update_fields=["text"])
+    comment = mixer.blend("blog.Comment", post=post, text="a & b\nc")
+
+    post.refresh_from_db()
+    assert post.text_html == "&lt;b&gt;Первая&lt;/b&gt;<br>вторая", (
+        "Убедитесь, что при сохранении публикации её текст экранируется и"
+        " сохраняется в HTML с переносами строк."
+    )
+    assert Comment.objects.get(pk=comment.pk).text_html == "a &amp; b<br>c"
+
+    content = client.get(f"/posts/{post.pk}/").content.decode("utf-8")
+    assert post.text_html in content
+    assert comment.text_html in content
+
+
+@pytest.mark.django_db
+def test_render_text_html_command(
+        user_client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    Post.objects.update(text_html="", excerpt="")
+    Comment.objects.update(text_html="")
+    # Caches the card with the empty excerpt.
+    user_client.get("/")
+
+    call_command("render_text_html", batch_size=2, stdout=StringIO())
+
+    assert not Post.objects.filter(text_html="").exists()
+    assert Post.objects.get(pk=post.pk).excerpt == make_excerpt(post.text), (
+        "Убедитесь, что команда `render_text_html` заполняет анонсы"
+        " публикаций."
+    )
+    assert escape(make_excerpt(post.text)) in (
+        user_client.get("/").content.decode("utf-8")
+    ), (
+        "Убедитесь, что после команды `render_text_html` карточки"
+        " публикаций показывают анонс."
+    )
+    assert not Comment.objects.filter(text_html="").exists(), (
+        "Убедитесь, что команда `render_text_html` заполняет HTML-версию"
+        " текста у всех комментариев."
+    )
+
+
+@pytest.mark.django_db
+def test_empty_text_html_falls_back_to_text(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = "<b>Первая</b>\nвторая"
+    post.save(update_fields=["text"])
+    mixer.blend("blog.Comment", post=post, text="a & b\nc")
+    Post.objects.update(text_html="")
+    Comment.objects.update(text_html="")
+
+    content = client.get(f"/posts/{post.pk}/").content.decode("utf-8")
+    assert "&lt;b&gt;Первая&lt;/b&gt;<br>вторая" in content, (
+        "Убедитесь, что публикация без HTML-версии текста (например,"
+        " загруженная из фикстуры) показывает свой текст."
+    )
+    assert "a &amp; b<br>c" in content
+
+
+@pytest.mark.django_db
+def test_rows_inserted_without_save_are_rendered(
+        post_with_published_location
+):
+    call_command("loaddata", DB_JSON, stdout=StringIO())
+    assert not Post.objects.filter(
+        Q(excerpt="") | Q(text_html="")
+    ).exists(), (
+        "Убедитесь, что у публикаций из фикстуры заполняются анонс и"
+        " HTML-версия текста."
+    )
+
+    post = post_with_published_location
+    Post.objects.bulk_create([
+        Post(
+            title="Новая", text="a & b", pub_date=post.pub_date,
+            author=post.author, category=post.category,
+        )
+    ])
+    created = Post.objects.get(title="Новая")
+    assert created.excerpt == make_excerpt("a & b")
+    assert created.text_html == "a &amp; b"
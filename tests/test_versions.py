@@ -0,0 +1,59 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Category, Post
+
+DB_JSON = Path(__file__).resolve().parent.parent / "db.json"
+
+
+@pytest.mark.django_db
+def test_saves_bump_version_and_updated_at(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    version, updated_at = post.version, post.updated_at
+
+    post.title = "Новый заголовок"
+    post.save(update_fields=["title"])
+    post.refresh_from_db()
+    assert post.version == version + 1, (
+        "Убедитесь, что каждое сохранение публикации увеличивает её версию,"
+        " в том числе при сохранении отдельных полей."
+    )
+    assert post.updated_at > updated_at
+
+    comment = mixer.blend("blog.Comment", post=post)
+    assert comment.version == 1
+    assert Post.objects.get(pk=post.pk).version == version + 2, (
+        "Убедитесь, что изменение счётчика комментариев увеличивает версию"
+        " публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_db_json_loads():
+    # Fixtures are saved raw, without auto_now.
+    call_command("loaddata", DB_JSON, stdout=StringIO())
+    assert Post.objects.count() == 39
+    assert not Category.objects.filter(updated_at=None).exists(), (
+        "Убедитесь, что фикстура `db.json` загружается командой `loaddata`."
+    )
+
+
+@pytest.mark.django_db
+def test_save_increments_stored_version(post_with_published_location):
+    post = post_with_published_location
+    version = Post.objects.get(pk=post.pk).version
+    # Another writer bumps the row after this instance was loaded.
+    Post.objects.filter(pk=post.pk).update(**Post.bump_fields())
+
+    post.save()
+    assert post.version == version + 2, (
+        "Убедитесь, что сохранение увеличивает версию, записанную в базе,"
+        " а не загруженную вместе с объектом."
+    )
+    post.save()
+    assert Post.objects.get(pk=post.pk).version == version + 3